@@ -1,12 +1,18 @@
 """
 Script to apply the migration to add formatted_tabular_data field to the scrape_sessions table.
+
+Other migration files can be applied by passing their paths as arguments. By default the
+statements are only printed; pass --execute to run each file through the exec_sql RPC.
 """
 import os
+import re
+import sys
+from typing import Iterable, Iterator, Tuple
 from supabase import create_client, Client
 from dotenv import load_dotenv
 
-# Load environment variables
-load_dotenv("backend/.env")
+# Load environment variables (relative to this file, so wrappers can run it from any directory)
+load_dotenv(os.path.join(os.path.dirname(os.path.abspath(__file__)), "backend", ".env"))
 
 # Supabase credentials
 SUPABASE_URL = os.getenv("SUPABASE_URL")
@@ -18,37 +24,130 @@ print(f"Supabase Key: {SUPABASE_KEY[:10]}...{SUPABASE_KEY[-10:]}")
 # Initialize Supabase client
 supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
 
-def apply_migration():
-    """Apply the migration to add formatted_tabular_data field."""
-    print("Applying migration to add formatted_tabular_data field...")
-    
-    # Read the migration SQL file
-    with open("backend/migrations/03_add_formatted_tabular_data.sql", "r") as f:
-        migration_sql = f.read()
-    
-    # Split the SQL into individual statements
-    statements = migration_sql.split(';')
-    
-    # Execute each statement
-    for statement in statements:
-        if statement.strip():
+DEFAULT_MIGRATION = "backend/migrations/03_add_formatted_tabular_data.sql"
+
+# Opening tag of a dollar-quoted string ($$ or $tag$)
+_DOLLAR_TAG = re.compile(r"\$[A-Za-z_][A-Za-z0-9_]*\$|\$\$")
+
+def split_sql_statements(sql: str) -> Iterator[str]:
+    """
+    Split SQL on top-level semicolons in a single pass.
+
+    Semicolons inside quoted strings (including E'...' escape strings),
+    quoted identifiers, dollar-quoted function bodies and comments do not
+    end a statement, unlike a plain str.split(';'), which breaks any
+    migration that defines a PL/pgSQL function.
+    """
+    start = 0
+    i = 0
+    n = len(sql)
+    while i < n:
+        ch = sql[i]
+        if ch in ("'", '"'):
+            # Quoted literal/identifier; a doubled quote is an escaped quote. In an
+            # E'...' escape string a backslash also escapes the next character
+            escape_string = ch == "'" and i > 0 and sql[i - 1] in "Ee" and (i < 2 or not (sql[i - 2].isalnum() or sql[i - 2] == "_"))
+            i += 1
+            while i < n:
+                if escape_string and sql[i] == "\\":
+                    i += 2
+                    continue
+                if sql[i] == ch:
+                    if i + 1 < n and sql[i + 1] == ch:
+                        i += 2
+                        continue
+                    break
+                i += 1
+        elif ch == "-" and sql.startswith("--", i):
+            newline = sql.find("\n", i)
+            i = n - 1 if newline == -1 else newline
+        elif ch == "/" and sql.startswith("/*", i):
+            end = sql.find("*/", i + 2)
+            i = n - 1 if end == -1 else end + 1
+        elif ch == "$":
+            match = _DOLLAR_TAG.match(sql, i)
+            if match:
+                end = sql.find(match.group(), match.end())
+                i = n - 1 if end == -1 else end + len(match.group()) - 1
+        elif ch == ";":
+            statement = sql[start:i].strip()
+            if statement:
+                yield statement
+            start = i + 1
+        i += 1
+
+    statement = sql[start:].strip()
+    if statement:
+        yield statement
+
+def parse_statements(sql: str) -> Tuple[str, ...]:
+    """
+    Split a migration into terminated statements.
+    """
+    # The terminator goes on its own line: a statement can end in a -- comment,
+    # which would otherwise swallow the semicolon and run into the next statement
+    return tuple(f"{statement}\n;" for statement in split_sql_statements(sql))
+
+def read_migrations(paths: Iterable[str]) -> Iterator[Tuple[str, str]]:
+    """
+    Read migration files and yield (path, sql) in the given order.
+    """
+    for path in paths:
+        with open(path, "r") as f:
+            yield path, f.read()
+
+def apply_migration(paths: Iterable[str] = (DEFAULT_MIGRATION,), execute: bool = False):
+    """
+    Apply the given migration files in order (formatted_tabular_data by default).
+
+    With execute=False the statements are only printed. With execute=True the statements
+    of all files are sent together in one call to the exec_sql RPC, which must exist in
+    the Supabase project.
+    """
+    paths = list(paths)
+    if execute:
+        # One RPC round trip for the whole batch instead of one per file; statements are
+        # re-terminated so a file without a trailing semicolon can't run into the next one
+        print(f"Applying migrations {', '.join(paths)}...")
+        batch_sql = "\n".join(
+            statement
+            for _, migration_sql in read_migrations(paths)
+            for statement in parse_statements(migration_sql)
+        )
+        try:
+            # Use the rpc function to execute raw SQL
+            response = supabase.rpc("exec_sql", {"sql_query": batch_sql}).execute()
+            print("Migration executed successfully!")
+            print(response)
+        except Exception as e:
+            print(f"Error executing migration: {e}")
+        return
+
+    for path, migration_sql in read_migrations(paths):
+        print(f"Applying migration {path}...")
+
+        # Split the SQL into individual statements and execute each one
+        for statement in parse_statements(migration_sql):
             try:
                 # Use the Supabase REST API to execute the SQL
                 # Note: This is a workaround since the Python client doesn't have direct SQL execution
                 # In a real-world scenario, you might want to use a proper database migration tool
-                print(f"Executing SQL: {statement.strip()}")
-                
+                print(f"Executing SQL: {statement}")
+
                 # For demonstration purposes, we'll use the rpc function to execute SQL
                 # This requires setting up a SQL function in Supabase that can execute arbitrary SQL
                 # For now, we'll just print the statement
                 print("SQL statement would be executed here.")
-                
+
                 # In a real implementation, you might do something like:
-                # supabase.rpc("execute_sql", {"sql": statement.strip()}).execute()
+                # supabase.rpc("execute_sql", {"sql": statement}).execute()
             except Exception as e:
                 print(f"Error executing SQL: {e}")
-    
+
     print("Migration applied successfully!")
 
 if __name__ == "__main__":
-    apply_migration()
+    args = sys.argv[1:]
+    execute = "--execute" in args
+    paths = [arg for arg in args if arg != "--execute"]
+    apply_migration(paths or (DEFAULT_MIGRATION,), execute=execute)
@@ -1,6 +1,8 @@
 """
 Diagnostic endpoints for system status and troubleshooting.
 """
+import asyncio
+
 from fastapi import APIRouter
 from typing import Dict, Any
 
@@ -18,7 +20,8 @@ async def get_system_resources() -> Dict[str, Any]:
     Returns:
         Dict[str, Any]: System resource information
     """
-    return check_system_resources()
+    # psutil samples CPU load for half a second; keep that off the event loop
+    return await asyncio.to_thread(check_system_resources)
 
 @router.get("/browser-check")
 async def check_browser_compatibility() -> Dict[str, Any]:
@@ -44,28 +47,21 @@ async def check_browser_compatibility() -> Dict[str, Any]:
             ]
         )
         
-        # Try to launch the browser
-        success = True
+        # Sample system resources before the launch, so Chromium starting up doesn't
+        # inflate cpu_percent; psutil blocks, so run it in a thread
+        resources = await asyncio.to_thread(check_system_resources)
+
+        # Try to launch the browser: open a crawler context and immediately close it
         error = None
         browser_info = {}
-        
         try:
-            # Create async context and immediately close it to test browser launch
-            import asyncio
-            async def test_browser():
-                async with AsyncWebCrawler(config=config) as crawler:
-                    browser_info.update(await crawler.get_browser_info())
-                    return True
-                
-            # Run the test
-            success = asyncio.run(test_browser())
+            async with AsyncWebCrawler(config=config) as crawler:
+                browser_info.update(await crawler.get_browser_info())
+            success = True
         except Exception as e:
             success = False
             error = str(e)
         
-        # Check system resources
-        resources = check_system_resources()
-        
         return {
             "browser_launch_success": success,
             "error": error,
@@ -76,5 +72,5 @@ async def check_browser_compatibility() -> Dict[str, Any]:
         return {
             "browser_launch_success": False,
             "error": f"Crawl4AI not properly installed: {str(e)}",
-            "system_resources": check_system_resources()
+            "system_resources": await asyncio.to_thread(check_system_resources)
         }
@@ -1,9 +1,10 @@
 """
 API endpoints for project management.
 """
-import json
+from ..utils import json_utils
 from ..services.enhanced_rag_service import EnhancedRAGService
 from ..database import supabase
+import asyncio
 import os
 from fastapi import APIRouter, Depends, HTTPException, status
 from typing import List
@@ -15,6 +16,9 @@ from ..dependencies.auth import get_current_user_id
 
 router = APIRouter(prefix="/projects", tags=["projects"])
 
+# Maximum number of sessions ingested at once when RAG is enabled for a project
+RAG_INGEST_CONCURRENCY = 4
+
 @router.get("/", response_model=List[ProjectResponse])
 async def get_projects(
     current_user_id: UUID = Depends(get_current_user_id),
@@ -152,7 +156,8 @@ async def enable_rag_and_ingest_project_data(
     # Then, ingest all existing scraped sessions using the same logic as the working manual ingestion
     try:
         # Get all scraped sessions that haven't been RAG ingested yet
-        sessions_response = supabase.table("scrape_sessions").select("*").eq("project_id", str(project_id)).eq("status", "scraped").execute()
+        # Only id and structured_data_json are used; skip raw_markdown and the rest
+        sessions_response = supabase.table("scrape_sessions").select("id, structured_data_json").eq("project_id", str(project_id)).eq("status", "scraped").execute()
         sessions = sessions_response.data or []
 
         if sessions:
@@ -166,37 +171,38 @@ async def enable_rag_and_ingest_project_data(
                 "deployment_name": os.getenv("AZURE_OPENAI_EMBEDDING_DEPLOYMENT", "text-embedding-ada-002")
             }
 
-            ingested_count = 0
-            for session in sessions:
+            semaphore = asyncio.Semaphore(RAG_INGEST_CONCURRENCY)
+
+            async def ingest_session(session) -> bool:
                 session_id = session["id"]
 
-                try:
-                    # Check if session has structured data (same as working manual ingestion)
-                    if not session.get('structured_data_json'):
-                        continue
-
-                    # Parse structured data (same as working manual ingestion)
-                    structured_data = json.loads(session['structured_data_json']) if isinstance(session['structured_data_json'], str) else session['structured_data_json']
-
-                    # Perform ingestion (same as working manual ingestion)
-                    success = await enhanced_rag_service.ingest_structured_content(
-                        project_id=project_id,
-                        session_id=UUID(session_id),
-                        structured_data=structured_data,
-                        embedding_api_keys=azure_credentials
-                    )
-
-                    if success:
-                        # Update session status (same as working manual ingestion)
-                        supabase.table('scrape_sessions').update({
-                            'status': 'rag_ingested'
-                        }).eq('id', session_id).execute()
-
-                        ingested_count += 1
-                    else:
-                        pass # RAG ingestion may have completed with warnings
-                except Exception as e:
-                    pass # Error ingesting this specific session, continue with others
+                # Bound concurrent sessions so embedding calls don't hit Azure rate limits
+                async with semaphore:
+                    try:
+                        # Check if session has structured data (same as working manual ingestion)
+                        if not session.get('structured_data_json'):
+                            return False
+
+                        # Parse structured data (same as working manual ingestion)
+                        structured_data = json_utils.parse_json_field(session['structured_data_json'])
+
+                        # Perform ingestion (same as working manual ingestion)
+                        success = await enhanced_rag_service.ingest_structured_content(
+                            project_id=project_id,
+                            session_id=UUID(session_id),
+                            structured_data=structured_data,
+                            embedding_api_keys=azure_credentials
+                        )
+
+                        # ingest_structured_content already marked the session rag_ingested on success
+                        return bool(success)
+                    except Exception as e:
+                        return False # Error ingesting this specific session, continue with others
+
+            # Ingest sessions concurrently instead of one after another
+            async with asyncio.TaskGroup() as task_group:
+                tasks = [task_group.create_task(ingest_session(session)) for session in sessions]
+            ingested_count = sum(task.result() for task in tasks)
 
         else:
             pass # No scraped sessions found
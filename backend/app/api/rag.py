@@ -1,8 +1,12 @@
 """
 API endpoints for RAG functionality.
 """
+import asyncio
+import logging
 import os
+from functools import lru_cache
 from fastapi import APIRouter, Depends, HTTPException, status
+from postgrest.exceptions import APIError
 from typing import List, Dict, Optional
 from uuid import UUID
 
@@ -13,11 +17,20 @@ from ..services.enhanced_rag_service import EnhancedRAGService
 from ..dependencies.auth import get_current_user, get_current_user_id
 from ..models.auth import UserResponse
 from ..config import settings
-from ..database import supabase
+from ..database import supabase, execute_async
+from ..utils import json_utils
 
 router = APIRouter(tags=["rag"])
 
-# Create a dependency that provides RAGService with settings
+logger = logging.getLogger(__name__)
+
+# PostgREST error code for an RPC function that does not exist (migration not applied)
+FUNCTION_NOT_FOUND = "PGRST202"
+
+# Create a dependency that provides RAGService with settings. The service holds
+# no per-request state, so one instance (and the Azure OpenAI client its title
+# generator builds) is shared instead of being constructed on every request.
+@lru_cache(maxsize=1)
 def get_rag_service():
     return RAGService(settings=settings)
 
@@ -218,10 +231,9 @@ async def ingest_session_to_rag(
     try:
         # Import database and get session
         from app.database import supabase
-        import json
 
-        # Get the session
-        session_response = supabase.table('scrape_sessions').select('*').eq('id', str(session_id)).eq('project_id', str(project_id)).single().execute()
+        # Get the session (only the columns ingestion reads; raw markdown can be large)
+        session_response = supabase.table('scrape_sessions').select('unique_scrape_identifier, structured_data_json').eq('id', str(session_id)).eq('project_id', str(project_id)).single().execute()
 
         if not session_response.data:
             raise HTTPException(status_code=404, detail="Session not found")
@@ -233,7 +245,7 @@ async def ingest_session_to_rag(
             raise HTTPException(status_code=400, detail="Session has no structured data to ingest")
 
         # Parse structured data
-        structured_data = json.loads(session_data['structured_data_json']) if isinstance(session_data['structured_data_json'], str) else session_data['structured_data_json']
+        structured_data = json_utils.parse_json_field(session_data['structured_data_json'])
 
         # Get Azure credentials from environment if not provided
         if not azure_credentials:
@@ -255,15 +267,13 @@ async def ingest_session_to_rag(
         )
 
         if success:
-            # Update session status to rag_ingested
-            supabase.table('scrape_sessions').update({
-                'status': 'rag_ingested'
-            }).eq('id', str(session_id)).execute()
+            # ingest_structured_content already marked the session rag_ingested
 
-            # Check how many embeddings were created
+            # Check how many embeddings were created (HEAD + exact count, so no
+            # vectors are transferred just to take a length)
             unique_id = session_data['unique_scrape_identifier']
-            embeddings = supabase.table('embeddings').select('*').eq('unique_name', unique_id).execute()
-            embedding_count = len(embeddings.data) if embeddings.data else 0
+            embeddings = supabase.table('embeddings').select('id', count='exact', head=True).eq('unique_name', unique_id).execute()
+            embedding_count = embeddings.count or 0
 
             return {
                 "success": True,
@@ -287,6 +297,50 @@ async def ingest_session_to_rag(
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"RAG ingestion failed: {str(e)}")
 
+async def _get_session_rag_details_per_session(project_id: UUID) -> List[Dict]:
+    """
+    Build rag-status session details with one embeddings count request per session.
+
+    Used when the get_session_rag_status database function is not available. The
+    independent requests are issued concurrently, so the wait is roughly one
+    round trip per stage rather than one per session.
+
+    Args:
+        project_id (UUID): Project ID
+
+    Returns:
+        List[Dict]: Session details with embedding counts
+    """
+    # Let Postgres decide which sessions have structured data instead of
+    # downloading every structured_data_json document just to test it
+    sessions_response, structured_response = await asyncio.gather(
+        execute_async(supabase.table('scrape_sessions').select(
+            'id, url, status, scraped_at, unique_scrape_identifier'
+        ).eq('project_id', str(project_id))),
+        execute_async(supabase.table('scrape_sessions').select('id').eq(
+            'project_id', str(project_id)
+        ).neq('structured_data_json', '{}'))
+    )
+    structured_ids = {session['id'] for session in structured_response.data or []}
+
+    sessions = sessions_response.data or []
+    embedding_counts = await asyncio.gather(*(
+        execute_async(supabase.table('embeddings').select('id', count='exact', head=True).eq('unique_name', session['unique_scrape_identifier']))
+        for session in sessions
+    ))
+
+    return [
+        {
+            "session_id": session['id'],
+            "url": session['url'],
+            "status": session['status'],
+            "scraped_at": session['scraped_at'],
+            "embeddings": embeddings.count or 0,
+            "has_structured_data": session['id'] in structured_ids
+        }
+        for session, embeddings in zip(sessions, embedding_counts)
+    ]
+
 @router.get("/projects/{project_id}/rag-status")
 async def get_project_rag_status(project_id: UUID):
     """
@@ -299,8 +353,6 @@ async def get_project_rag_status(project_id: UUID):
         Dict: RAG status information
     """
     try:
-
-        # Get project RAG enabled status
         project_response = supabase.table('projects').select('rag_enabled').eq('id', str(project_id)).single().execute()
 
         if not project_response.data:
@@ -308,36 +360,39 @@ async def get_project_rag_status(project_id: UUID):
 
         rag_enabled = project_response.data['rag_enabled']
 
-        # Get all sessions for this project
-        sessions_response = supabase.table('scrape_sessions').select('*').eq('project_id', str(project_id)).execute()
-        sessions = sessions_response.data or []
-
-        # Count RAG-ingested sessions
-        rag_sessions = [s for s in sessions if s['status'] == 'rag_ingested']
-
-        # Count total embeddings for this project
-        total_embeddings = 0
-        session_details = []
-
-        for session in sessions:
-            unique_id = session['unique_scrape_identifier']
-            embeddings = supabase.table('embeddings').select('*').eq('unique_name', unique_id).execute()
-            embedding_count = len(embeddings.data) if embeddings.data else 0
-            total_embeddings += embedding_count
-
-            session_details.append({
-                "session_id": session['id'],
-                "url": session['url'],
-                "status": session['status'],
-                "scraped_at": session['scraped_at'],
-                "embeddings": embedding_count,
-                "has_structured_data": bool(session.get('structured_data_json'))
-            })
+        try:
+            # Sessions and their embedding counts in one round trip
+            # (migrations/13_add_session_rag_status_function.sql)
+            status_response = await execute_async(supabase.rpc(
+                "get_session_rag_status",
+                {"p_project_id": str(project_id)}
+            ))
+            session_details = [
+                {
+                    "session_id": row['session_id'],
+                    "url": row['url'],
+                    "status": row['status'],
+                    "scraped_at": row['scraped_at'],
+                    "embeddings": row['embedding_count'] or 0,
+                    "has_structured_data": bool(row['has_structured_data'])
+                }
+                for row in status_response.data or []
+            ]
+        except APIError as e:
+            if e.code != FUNCTION_NOT_FOUND:
+                logger.error(f"get_session_rag_status failed for project {project_id}: {e}")
+                raise
+            # Function not installed yet; fall back to one count request per session
+            session_details = await _get_session_rag_details_per_session(project_id)
+
+        # Count RAG-ingested sessions and total embeddings for this project
+        rag_sessions = [s for s in session_details if s['status'] == 'rag_ingested']
+        total_embeddings = sum(s['embeddings'] for s in session_details)
 
         return {
             "project_id": str(project_id),
             "rag_enabled": rag_enabled,
-            "total_sessions": len(sessions),
+            "total_sessions": len(session_details),
             "rag_ingested_sessions": len(rag_sessions),
             "total_embeddings": total_embeddings,
             "sessions": session_details
@@ -13,6 +13,9 @@ class Settings(BaseSettings):
     # API settings
     API_V1_STR: str = "/api/v1"
 
+    # Debug mode: full tracebacks are only formatted for handled errors when enabled
+    DEBUG: bool = os.getenv("DEBUG", "").lower() in ("1", "true", "yes")
+
     # CORS settings (comma-separated list, e.g. "http://localhost:9002,http://localhost:3000").
     # Leave empty to let `main.py` fall back to sensible dev defaults.
     CORS_ORIGINS: str = os.getenv("CORS_ORIGINS", "")
@@ -27,6 +30,8 @@ class Settings(BaseSettings):
 
     # RAG settings
     EMBEDDING_BATCH_SIZE: int = int(os.getenv("EMBEDDING_BATCH_SIZE", "20"))  # Number of chunks to process in a single API call
+    EMBEDDING_MAX_TOKENS_PER_REQUEST: int = int(os.getenv("EMBEDDING_MAX_TOKENS_PER_REQUEST", "8000"))  # Token budget for one embeddings API call
+    EMBEDDING_MAX_CONCURRENCY: int = int(os.getenv("EMBEDDING_MAX_CONCURRENCY", "4"))  # Embedding API calls in flight per document
     WEB_CACHE_EXPIRY_HOURS: int = int(os.getenv("WEB_CACHE_EXPIRY_HOURS", "24"))  # Cache expiry time in hours
 
     # Timeout settings
@@ -1,7 +1,9 @@
 """
 Database connection and initialization.
 """
+import asyncio
 import os
+from functools import lru_cache
 from supabase import create_client, Client
 from dotenv import load_dotenv
 
@@ -10,9 +12,13 @@ load_dotenv()
 SUPABASE_URL = os.getenv("SUPABASE_URL")
 SUPABASE_KEY = os.getenv("SUPABASE_KEY")
 
+@lru_cache(maxsize=1)
 def get_supabase_client() -> Client:
     """
     Create and return a Supabase client.
+
+    The client is memoized so every caller shares one instance and its
+    pooled HTTP connections instead of paying a new TLS handshake each time.
     
     Returns:
         Client: Supabase client
@@ -27,3 +33,19 @@ def get_supabase_client() -> Client:
 
 # Create a global Supabase client instance
 supabase = get_supabase_client()
+
+async def execute_async(query):
+    """
+    Run a PostgREST query's blocking execute() in the default executor.
+
+    The sync supabase client would otherwise stall the event loop for the
+    full network round trip, serializing concurrent ingestion tasks.
+
+    Args:
+        query: A supabase query builder (e.g. supabase.table(...).select(...))
+
+    Returns:
+        The APIResponse returned by query.execute()
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(None, query.execute)
@@ -3,6 +3,7 @@ Authentication dependencies for FastAPI.
 """
 import jwt
 import os
+from collections import OrderedDict
 from typing import Optional
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
@@ -15,6 +16,11 @@ from ..models.auth import UserResponse
 # Security scheme for Bearer token (auto_error=False to handle errors manually)
 security = HTTPBearer(auto_error=False)
 
+# Decoded payloads of recently verified tokens. The frontend sends the same
+# bearer token on every request until it refreshes, so decode it once.
+_TOKEN_CACHE_SIZE = 1024
+_token_cache: "OrderedDict[str, dict]" = OrderedDict()
+
 async def get_auth_service() -> AuthService:
     """
     Dependency to get AuthService instance.
@@ -37,6 +43,18 @@ def verify_jwt_token(token: str) -> dict:
     Raises:
         HTTPException: If token is invalid
     """
+    cached = _token_cache.get(token)
+    if cached is not None:
+        # Expiry still has to be checked on every use
+        if 'exp' in cached and datetime.utcnow().timestamp() > cached['exp']:
+            _token_cache.pop(token, None)
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Token has expired"
+            )
+        _token_cache.move_to_end(token)
+        return cached
+
     try:
         print(f"🔍 Verifying JWT token...")
 
@@ -60,6 +78,9 @@ def verify_jwt_token(token: str) -> dict:
                 )
 
         print("✅ Token verification successful")
+        _token_cache[token] = decoded
+        if len(_token_cache) > _TOKEN_CACHE_SIZE:
+            _token_cache.popitem(last=False)
         return decoded
     except jwt.InvalidTokenError as e:
         print(f"❌ JWT decode error: {e}")
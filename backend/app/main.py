@@ -12,6 +12,8 @@ from fastapi.responses import JSONResponse
 from .api import projects, scraping, rag, websockets, project_urls, history, project_settings, auth
 from .config import settings
 from .services.scraping_service import ScrapingService
+from .utils.http_client import close_http_client
+from .utils import logging_utils  # noqa: F401  (configures queued application logging)
 from uuid import UUID
 from fastapi import Depends
 # Import diagnostics separately to avoid module not found errors
@@ -63,6 +65,11 @@ try:
 except (NameError, AttributeError) as e:
     print(f"Warning: Diagnostics endpoints not available: {str(e)}")
 
+@app.on_event("shutdown")
+async def shutdown_http_client():
+    """Release the shared outbound HTTP connection pool."""
+    await close_http_client()
+
 @app.get("/health")
 async def health_check():
     """Health check endpoint for deployment monitoring."""
@@ -1,4 +1,5 @@
 import os
+from functools import lru_cache
 from dotenv import load_dotenv
 from supabase import create_client
 from .assets import MODELS_USED
@@ -15,8 +16,9 @@ def get_api_key(model):
     env_var_name = list(MODELS_USED[model])[0]  # e.g., "GEMINI_API_KEY"
     return os.getenv(env_var_name)
 
+@lru_cache(maxsize=1)
 def get_supabase_client():
-    """Returns a Supabase client if credentials exist, otherwise returns None."""
+    """Returns a shared Supabase client if credentials exist, otherwise returns None."""
     supabase_url = os.getenv('SUPABASE_URL')
     supabase_key = os.getenv('SUPABASE_ANON_KEY')
 
@@ -1,20 +1,24 @@
 # markdown.py
 
 import asyncio
-from typing import List
+from contextlib import AsyncExitStack
+from typing import TYPE_CHECKING, List, Optional
 from ..database import supabase # Import supabase client from the main app's database module
 from .utils import generate_unique_name
-from crawl4ai import AsyncWebCrawler, BrowserConfig
 
+if TYPE_CHECKING:
+    # crawl4ai pulls in Playwright; it is imported on first crawl, not at startup
+    from crawl4ai import AsyncWebCrawler, BrowserConfig
 
-async def get_fit_markdown_async(url: str) -> str:
+
+def _browser_config() -> "BrowserConfig":
     """
-    Async function using crawl4ai's AsyncWebCrawler to produce the regular raw markdown.
-    (Reverting from the 'fit' approach back to normal.)
+    Browser configuration shared by every crawl.
     """
-    
+    from crawl4ai import BrowserConfig
+
     # Configure browser without unsupported timeout arguments
-    config = BrowserConfig(
+    return BrowserConfig(
         headless=True,
         extra_args=[
             "--no-sandbox",
@@ -28,19 +32,46 @@ async def get_fit_markdown_async(url: str) -> str:
         ]
     )
 
+
+def _new_crawler() -> "AsyncWebCrawler":
+    """
+    Create a crawler, importing crawl4ai only when a crawl actually happens.
+    """
+    from crawl4ai import AsyncWebCrawler
+
+    return AsyncWebCrawler(config=_browser_config())
+
+
+async def _crawl_markdown(crawler: "AsyncWebCrawler", url: str) -> str:
+    """
+    Crawl one URL with an already started crawler and return its markdown.
+    """
+    # Use longer timeout for scraping operations
+    result = await crawler.arun(
+        url=url,
+        page_timeout=300000,  # 5 minutes page timeout
+        delay_before_return_html=3.0  # Wait 3 seconds for dynamic content
+    )
+    if result.success:
+        return result.markdown
+    else:
+        # Optionally, log this error to a file or logging service
+        return ""
+
+
+async def get_fit_markdown_async(url: str, crawler: Optional["AsyncWebCrawler"] = None) -> str:
+    """
+    Async function using crawl4ai's AsyncWebCrawler to produce the regular raw markdown.
+    (Reverting from the 'fit' approach back to normal.)
+
+    Pass an already started crawler to reuse its browser across URLs; otherwise
+    a browser is launched for this call only.
+    """
     try:
-        async with AsyncWebCrawler(config=config) as crawler:
-            # Use longer timeout for scraping operations
-            result = await crawler.arun(
-                url=url,
-                page_timeout=300000,  # 5 minutes page timeout
-                delay_before_return_html=3.0  # Wait 3 seconds for dynamic content
-            )
-            if result.success:
-                return result.markdown
-            else:
-                # Optionally, log this error to a file or logging service
-                return ""
+        if crawler is not None:
+            return await _crawl_markdown(crawler, url)
+        async with _new_crawler() as own_crawler:
+            return await _crawl_markdown(own_crawler, url)
     except Exception as e:
         # Optionally, log this error to a file or logging service
         return ""
@@ -93,22 +124,32 @@ async def fetch_and_store_markdowns(urls: List[str]) -> List[str]: # Changed to
     """
     unique_names = []
 
-    for url in urls:
-        unique_name = generate_unique_name(url)
-        # check if we already have raw_data in supabase
-        # read_raw_data is synchronous, needs to be called carefully in async context
-        # For Supabase client, if it's synchronous, it might block.
-        # Assuming supabase client calls are synchronous for now.
-        # If supabase client is async, read_raw_data should be async too.
-        # For now, let's assume read_raw_data and save_raw_data are quick enough or will be made async later if they block.
-        raw_data = read_raw_data(unique_name) # This is sync
-        if raw_data:
-            pass # Optionally, log that existing data was found
-        else:
-            # fetch fit markdown
-            fit_md = await get_fit_markdown_async(url) # Changed to await async version
-            # Optionally, log the fetched markdown if needed for debugging, but not in production
-            save_raw_data(unique_name, url, fit_md) # This is sync
-        unique_names.append(unique_name)
+    # One browser for the whole batch, launched only if some URL needs fetching;
+    # starting Chromium per URL costs seconds each
+    async with AsyncExitStack() as stack:
+        crawler = None
+        shared_failed = False # Don't retry a failed shared launch for every remaining URL
+        for url in urls:
+            unique_name = generate_unique_name(url)
+            # check if we already have raw_data in supabase
+            # read_raw_data is synchronous, needs to be called carefully in async context
+            # For Supabase client, if it's synchronous, it might block.
+            # Assuming supabase client calls are synchronous for now.
+            # If supabase client is async, read_raw_data should be async too.
+            # For now, let's assume read_raw_data and save_raw_data are quick enough or will be made async later if they block.
+            raw_data = read_raw_data(unique_name) # This is sync
+            if raw_data:
+                pass # Optionally, log that existing data was found
+            else:
+                # fetch fit markdown
+                if crawler is None and not shared_failed:
+                    try:
+                        crawler = await stack.enter_async_context(_new_crawler())
+                    except Exception:
+                        shared_failed = True # get_fit_markdown_async will try its own browser
+                fit_md = await get_fit_markdown_async(url, crawler) # Changed to await async version
+                # Optionally, log the fetched markdown if needed for debugging, but not in production
+                save_raw_data(unique_name, url, fit_md) # This is sync
+            unique_names.append(unique_name)
 
     return unique_names
@@ -1,22 +1,91 @@
 """
 Enhanced RAG Service with intelligent data processing and response formatting.
 """
+import asyncio
+import heapq
 import json
 import re
-import httpx
 import numpy as np
 from typing import Dict, List, Optional, Any, Tuple, Union
 from uuid import UUID, uuid4
 from datetime import datetime
 import logging
 
+import httpx
 from fastapi import HTTPException
-from ..database import supabase
+from ..database import supabase, execute_async
 from ..models.chat import RAGQueryResponse, ChatMessageResponse
 from ..config import settings
+from ..utils.embedding import EMBEDDING_MAX_RETRIES, retry_delay, to_pgvector_literal
+from ..utils import json_utils
+from ..utils.http_client import get_http_client
+from ..utils.text_processing import keyword_regex
+from .rag_service import fetch_chunks
 
 logger = logging.getLogger(__name__)
 
+# Number of chunks embedded and written per round during ingestion
+INGEST_BATCH_SIZE = 200
+
+# Errors meaning the embeddings endpoint could not be reached at all
+_UNREACHABLE_ERRORS = (httpx.ConnectError, httpx.ConnectTimeout)
+
+# Query-intent keyword tables, built once at import instead of on every query
+
+# Data display patterns
+_DISPLAY_PATTERNS = (
+    'show', 'display', 'list', 'give me', 'what are', 'tell me about',
+    'find', 'get', 'retrieve', 'present', 'output'
+)
+# Comparison patterns
+_COMPARISON_PATTERNS = (
+    'compare', 'difference', 'vs', 'versus', 'better', 'best', 'worst',
+    'cheaper', 'expensive', 'higher', 'lower', 'more', 'less'
+)
+# Statistics patterns
+_STATS_PATTERNS = (
+    'how many', 'count', 'total', 'average', 'mean', 'sum', 'statistics',
+    'stats', 'number of', 'quantity'
+)
+# Summary patterns
+_SUMMARY_PATTERNS = (
+    'summary', 'summarize', 'overview', 'brief', 'outline', 'recap'
+)
+# Specific item patterns
+_SPECIFIC_PATTERNS = (
+    'details about', 'information about', 'tell me about', 'what is',
+    'describe', 'explain'
+)
+# Price patterns
+_PRICE_PATTERNS = (
+    'price', 'cost', 'expensive', 'cheap', 'budget', 'affordable',
+    'pricing', 'money', '$', 'dollar'
+)
+# Chart format requests - only when explicitly requested
+_EXPLICIT_CHART_KEYWORDS = (
+    'chart', 'graph', 'plot', 'visualize', 'visualization',
+    'bar chart', 'pie chart', 'line chart', 'create a chart',
+    'show me a chart', 'make a chart', 'generate a chart',
+    'draw a chart', 'display a chart'
+)
+# List indicators
+_LIST_WORDS = ('all', 'every', 'each', 'list')
+# Common stop words dropped from keyword extraction
+_STOP_WORDS = frozenset({'the', 'a', 'an', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for', 'of', 'with', 'by', 'is', 'are', 'was', 'were', 'be', 'been', 'have', 'has', 'had', 'do', 'does', 'did', 'will', 'would', 'could', 'should', 'may', 'might', 'can', 'what', 'how', 'when', 'where', 'why', 'who', 'tell', 'me', 'about'})
+
+# Each keyword table checked in a single compiled scan rather than one `in` walk per keyword
+_DISPLAY_RE = keyword_regex(_DISPLAY_PATTERNS)
+_COMPARISON_RE = keyword_regex(_COMPARISON_PATTERNS)
+_STATS_RE = keyword_regex(_STATS_PATTERNS)
+_SUMMARY_RE = keyword_regex(_SUMMARY_PATTERNS)
+_SPECIFIC_RE = keyword_regex(_SPECIFIC_PATTERNS)
+_PRICE_RE = keyword_regex(_PRICE_PATTERNS)
+_EXPLICIT_CHART_RE = keyword_regex(_EXPLICIT_CHART_KEYWORDS)
+_LIST_WORDS_RE = keyword_regex(_LIST_WORDS)
+
+# Fenced ```json block holding the chart object in a chart-format answer
+_CHART_JSON_BLOCK_RE = re.compile(r'```json\s*(\{.*?\})\s*```', re.DOTALL)
+
 class EnhancedRAGService:
     """Enhanced RAG service with structured data processing and intelligent formatting."""
     
@@ -61,7 +130,9 @@ class EnhancedRAGService:
                 return False
             
             # Get the generated unique_scrape_identifier from the session
-            session_response = supabase.table("scrape_sessions").select("unique_scrape_identifier").eq("id", str(session_id)).single().execute()
+            session_response = await execute_async(
+                supabase.table("scrape_sessions").select("unique_scrape_identifier").eq("id", str(session_id)).single()
+            )
 
             if not session_response.data or not session_response.data.get("unique_scrape_identifier"):
                 logger.error(f"No unique_scrape_identifier found for session {session_id}")
@@ -70,34 +141,59 @@ class EnhancedRAGService:
             unique_scrape_identifier = session_response.data["unique_scrape_identifier"]
 
             # Store the processed structured content
-            supabase.table("markdowns").insert({
+            # Upsert on unique_name so re-ingesting a session overwrites its markdown
+            await execute_async(supabase.table("markdowns").upsert({
                 "unique_name": unique_scrape_identifier,
                 "markdown": processed_content,  # Use 'markdown' column, not 'content'
                 "url": structured_data.get("source_url", "")
-            }).execute()
+            }, on_conflict="unique_name"))
             
-            # Generate embeddings for structured content chunks
+            # Generate and store embeddings for structured content chunks one slice
+            # at a time, so only INGEST_BATCH_SIZE vectors are held in memory at once
             chunks = self._create_smart_chunks(processed_content, structured_data)
-            embeddings = await self._generate_embeddings_for_chunks(chunks, embedding_api_keys)
-            
-            # Store embeddings (match original format)
-            for i, (chunk, embedding) in enumerate(zip(chunks, embeddings)):
-                supabase.table("embeddings").insert({
-                    "unique_name": unique_scrape_identifier,
-                    "chunk_id": i,
-                    "content": chunk,
-                    "embedding": embedding
-                }).execute()
+            for start in range(0, len(chunks), INGEST_BATCH_SIZE):
+                batch_chunks = chunks[start:start + INGEST_BATCH_SIZE]
+                try:
+                    embeddings = await self._generate_embeddings_for_chunks(batch_chunks, embedding_api_keys)
+                except _UNREACHABLE_ERRORS as e:
+                    # The endpoint is down: fall back for this slice and stop calling it, so the
+                    # remaining slices don't each wait out a connect timeout
+                    logger.warning(f"Azure OpenAI unreachable ({e!r}), using fallback embeddings for the rest of the session")
+                    embedding_api_keys = {}
+                    embeddings = [self._generate_fallback_embedding(chunk) for chunk in batch_chunks]
+
+                # Store embeddings (match original format); unique_chunk_per_doc
+                # makes (unique_name, chunk_id) the conflict target
+                embedding_rows = [
+                    {
+                        "unique_name": unique_scrape_identifier,
+                        "chunk_id": start + i,
+                        "content": chunk,
+                        "embedding": to_pgvector_literal(embedding)
+                    }
+                    for i, (chunk, embedding) in enumerate(zip(batch_chunks, embeddings))
+                ]
+                await execute_async(
+                    supabase.table("embeddings").upsert(embedding_rows, on_conflict="unique_name,chunk_id")
+                )
             
-            # Update session status (don't update unique_scrape_identifier as it's generated)
-            supabase.table("scrape_sessions").update({
+            # Upserts only overwrite chunk_ids 0..N-1; drop rows a previous, larger
+            # ingest of this session left behind so they are no longer retrieved
+            await execute_async(
+                supabase.table("embeddings").delete().eq("unique_name", unique_scrape_identifier).gte("chunk_id", len(chunks))
+            )
+
+            # Update session status (don't update unique_scrape_identifier as it's generated);
+            # the session and project URL writes are independent, so send them together
+            status_updates = [execute_async(supabase.table("scrape_sessions").update({
                 "status": "rag_ingested"
-            }).eq("id", str(session_id)).execute()
+            }).eq("id", str(session_id)))]
             
             if project_url_id:
-                supabase.table("project_urls").update({
+                status_updates.append(execute_async(supabase.table("project_urls").update({
                     "status": "completed"
-                }).eq("id", str(project_url_id)).execute()
+                }).eq("id", str(project_url_id))))
+            await asyncio.gather(*status_updates)
             
             logger.info(f"Successfully ingested structured content for session {session_id}")
             return True
@@ -105,9 +201,9 @@ class EnhancedRAGService:
         except Exception as e:
             logger.error(f"Error ingesting structured content: {e}")
             if project_url_id:
-                supabase.table("project_urls").update({
+                await execute_async(supabase.table("project_urls").update({
                     "status": "failed"
-                }).eq("id", str(project_url_id)).execute()
+                }).eq("id", str(project_url_id)))
             return False
     
     def _extract_structured_content(self, structured_data: Dict[str, Any]) -> str:
@@ -157,38 +253,40 @@ class EnhancedRAGService:
         Returns:
             List[str]: Smart chunks for embedding
         """
-        chunks = []
         tabular_data = structured_data.get("tabular_data", [])
         
-        # Create one chunk per item in tabular data
-        for i, item in enumerate(tabular_data):
-            chunk_parts = []
-            
-            # Add context
-            if "title" in structured_data:
-                chunk_parts.append(f"Source: {structured_data['title']}")
-            
-            chunk_parts.append(f"Item {i + 1}:")
-            
-            # Add all fields for this item
-            for field, value in item.items():
-                if value and str(value).strip():
-                    clean_field = field.replace('_', ' ').title()
-                    chunk_parts.append(f"{clean_field}: {value}")
-            
-            chunks.append("\n".join(chunk_parts))
+        # Add context (identical for every item, so build it once)
+        source_parts = [f"Source: {structured_data['title']}"] if "title" in structured_data else []
+        
+        # Create one chunk per item in tabular data, with all fields for that item
+        chunks = [
+            "\n".join([
+                *source_parts,
+                f"Item {i + 1}:",
+                *(
+                    f"{field.replace('_', ' ').title()}: {value}"
+                    for field, value in item.items()
+                    if value and str(value).strip()
+                ),
+            ])
+            for i, item in enumerate(tabular_data)
+        ]
         
         # If no tabular data, create chunks from the content
         if not chunks:
-            # Split content into logical chunks
+            # Split content into logical chunks, tracking the joined length as lines
+            # are added instead of re-joining the whole chunk after every line
             lines = content.split('\n')
             current_chunk = []
+            current_length = -1  # joined length of current_chunk (no separator before the first line)
             
             for line in lines:
                 current_chunk.append(line)
-                if len('\n'.join(current_chunk)) > 500:  # Chunk size limit
+                current_length += len(line) + 1
+                if current_length > 500:  # Chunk size limit
                     chunks.append('\n'.join(current_chunk))
                     current_chunk = []
+                    current_length = -1
             
             if current_chunk:
                 chunks.append('\n'.join(current_chunk))
@@ -196,7 +294,12 @@ class EnhancedRAGService:
         return chunks if chunks else [content]
 
     async def _generate_embeddings_for_chunks(self, chunks: List[str], embedding_api_keys: Dict[str, str]) -> List[List[float]]:
-        """Generate embeddings for chunks using Azure OpenAI or fallback method."""
+        """
+        Generate embeddings for chunks using Azure OpenAI or fallback method.
+
+        Connection failures are re-raised rather than masked by the fallback,
+        so the caller can skip the endpoint for the rest of an ingest.
+        """
         try:
             # Try Azure OpenAI first
             api_key = embedding_api_keys.get("api_key")
@@ -207,36 +310,57 @@ class EnhancedRAGService:
                 logger.info("Using Azure OpenAI for embeddings")
                 url = f"{endpoint}/openai/deployments/text-embedding-ada-002/embeddings?api-version={api_version}"
 
-                embeddings = []
-                async with httpx.AsyncClient(timeout=30.0) as client:
-                    for chunk in chunks:
-                        payload = {
-                            "input": chunk,
-                            "model": "text-embedding-ada-002"
-                        }
-
-                        response = await client.post(
-                            url,
-                            json=payload,
-                            headers={
-                                "Content-Type": "application/json",
-                                "api-key": api_key
-                            }
-                        )
-
-                        if response.status_code == 200:
-                            result = response.json()
-                            embedding = result["data"][0]["embedding"]
-                            embeddings.append(embedding)
-                        else:
-                            logger.warning(f"Azure OpenAI embedding failed: {response.status_code}, using fallback")
-                            embeddings.append(self._generate_fallback_embedding(chunk))
-
-                return embeddings
+                # Send chunks in batches (the embeddings API accepts a list input)
+                # instead of one request per chunk; up to EMBEDDING_MAX_CONCURRENCY
+                # batches are in flight at once over the shared (HTTP/2) client
+                batch_size = settings.EMBEDDING_BATCH_SIZE
+                client = get_http_client()
+                semaphore = asyncio.Semaphore(settings.EMBEDDING_MAX_CONCURRENCY)
+
+                async def embed_batch(batch: List[str]) -> List[List[float]]:
+                    payload = {
+                        "input": batch,
+                        "model": "text-embedding-ada-002"
+                    }
+
+                    async with semaphore:
+                        # Back off on rate limiting (429) like generate_embeddings_batch,
+                        # so a throttled batch isn't stored as fallback hash vectors
+                        for attempt in range(EMBEDDING_MAX_RETRIES + 1):
+                            response = await client.post(
+                                url,
+                                json=payload,
+                                headers={
+                                    "Content-Type": "application/json",
+                                    "api-key": api_key
+                                }
+                            )
+                            if response.status_code != 429 or attempt == EMBEDDING_MAX_RETRIES:
+                                break
+                            await asyncio.sleep(retry_delay(response, attempt))
+
+                    if response.status_code == 200:
+                        # Parse the raw bytes with orjson; embedding batches are large payloads
+                        result = json_utils.loads(response.content)
+                        # Items carry their input index; don't rely on response order
+                        data = sorted(result["data"], key=lambda item: item["index"])
+                        return [item["embedding"] for item in data]
+                    logger.warning(f"Azure OpenAI embedding failed: {response.status_code}, using fallback")
+                    return [self._generate_fallback_embedding(chunk) for chunk in batch]
+
+                # gather keeps results in batch order, so embeddings line up with chunks
+                results = await asyncio.gather(*(
+                    embed_batch(chunks[start:start + batch_size])
+                    for start in range(0, len(chunks), batch_size)
+                ))
+                return [embedding for batch_embeddings in results for embedding in batch_embeddings]
             else:
                 logger.info("Azure OpenAI credentials not available, using fallback embeddings")
                 return [self._generate_fallback_embedding(chunk) for chunk in chunks]
 
+        except _UNREACHABLE_ERRORS:
+            # Let the caller stop retrying an endpoint that refuses connections
+            raise
         except Exception as e:
             logger.warning(f"Error with Azure OpenAI embeddings, using fallback: {e}")
             return [self._generate_fallback_embedding(chunk) for chunk in chunks]
@@ -244,50 +368,33 @@ class EnhancedRAGService:
     def _generate_fallback_embedding(self, text: str) -> List[float]:
         """Generate a deterministic fallback embedding based on text content."""
         import hashlib
-        import math
-
-        # Create a deterministic hash-based embedding
-        text_bytes = text.encode('utf-8')
-        hash_obj = hashlib.sha256(text_bytes)
-        hash_hex = hash_obj.hexdigest()
-
-        # Convert hash to embedding vector (1536 dimensions for compatibility)
-        embedding = []
-        for i in range(0, len(hash_hex), 2):
-            # Convert hex pairs to floats between -1 and 1
-            hex_pair = hash_hex[i:i+2]
-            value = int(hex_pair, 16) / 255.0  # Normalize to 0-1
-            value = (value - 0.5) * 2  # Scale to -1 to 1
-            embedding.append(value)
-
-        # Extend to 1536 dimensions by repeating and adding text-based features
-        while len(embedding) < 1536:
-            # Add text-based features
-            text_features = [
-                len(text) / 1000.0,  # Text length feature
-                text.count(' ') / 100.0,  # Word count feature
-                text.count('\n') / 10.0,  # Line count feature
-                sum(1 for c in text if c.isupper()) / 100.0,  # Uppercase count
-                sum(1 for c in text if c.isdigit()) / 100.0,  # Digit count
-            ]
 
-            # Repeat existing embedding with slight variations
-            for i, val in enumerate(embedding[:min(100, len(embedding))]):
-                if len(embedding) >= 1536:
-                    break
-                # Add slight variation based on text features
-                variation = text_features[i % len(text_features)] * 0.1
-                embedding.append(val + variation)
-
-        # Ensure exactly 1536 dimensions
-        embedding = embedding[:1536]
+        # Create a deterministic hash-based embedding: sha256 bytes scaled to -1..1
+        digest = hashlib.sha256(text.encode('utf-8')).digest()
+        embedding = (np.frombuffer(digest, dtype=np.uint8) / 255.0 - 0.5) * 2
+
+        # Text-based features (constant for the text, so computed once)
+        text_features = np.array([
+            len(text) / 1000.0,  # Text length feature
+            text.count(' ') / 100.0,  # Word count feature
+            text.count('\n') / 10.0,  # Line count feature
+            sum(1 for c in text if c.isupper()) / 100.0,  # Uppercase count
+            sum(1 for c in text if c.isdigit()) / 100.0,  # Digit count
+        ])
+
+        # Extend to 1536 dimensions by repeating the leading values (up to 100 at a
+        # time) with slight variations, one whole slice per pass instead of per element
+        while len(embedding) < 1536:
+            prefix = embedding[:min(100, len(embedding), 1536 - len(embedding))]
+            variation = text_features[np.arange(len(prefix)) % len(text_features)] * 0.1
+            embedding = np.concatenate((embedding, prefix + variation))
 
         # Normalize the vector
-        magnitude = math.sqrt(sum(x*x for x in embedding))
+        magnitude = np.linalg.norm(embedding)
         if magnitude > 0:
-            embedding = [x / magnitude for x in embedding]
+            embedding = embedding / magnitude
 
-        return embedding
+        return embedding.tolist()
 
     async def enhanced_query_rag(
         self,
@@ -355,9 +462,8 @@ class EnhancedRAGService:
             return response
 
         except Exception as e:
-            import traceback
-            error_details = traceback.format_exc()
-            logger.error(f"Error in enhanced RAG query: {str(e)}\nFull traceback: {error_details}")
+            # Only pay for traceback formatting when debugging
+            logger.error(f"Error in enhanced RAG query: {str(e)}", exc_info=settings.DEBUG)
             return RAGQueryResponse(
                 answer=f"I encountered an error while processing your query: {str(e)}",
                 generation_cost=0.0,
@@ -384,12 +490,8 @@ class EnhancedRAGService:
 
         # Get embeddings-based matches using keyword search
         try:
-            # Get all chunks for this project's sessions
-            all_chunks = []
-            for unique_name in unique_names:
-                chunks_response = supabase.table("embeddings").select("*").eq("unique_name", unique_name).execute()
-                if chunks_response.data:
-                    all_chunks.extend(chunks_response.data)
+            # Get all chunks for this project's sessions, paged past the max-rows cap
+            all_chunks = await fetch_chunks(unique_names)
 
             # Score chunks based on keyword relevance
             scored_chunks = []
@@ -398,9 +500,8 @@ class EnhancedRAGService:
                 if score > 0.05:  # Lower threshold for better recall
                     scored_chunks.append((chunk, score))
 
-            # Sort by relevance and return top matches
-            scored_chunks.sort(key=lambda x: x[1], reverse=True)
-            top_chunks = [chunk for chunk, score in scored_chunks[:8]]
+            # Select the top matches by relevance without sorting every scored chunk
+            top_chunks = [chunk for chunk, score in heapq.nlargest(8, scored_chunks, key=lambda x: x[1])]
 
             logger.info(f"Enhanced context found {len(top_chunks)} relevant chunks for query: {query}")
             return top_chunks
@@ -421,12 +522,8 @@ class EnhancedRAGService:
 
             unique_names = [session["unique_scrape_identifier"] for session in sessions_response.data]
 
-            # Get all chunks from embeddings table as fallback
-            all_chunks = []
-            for unique_name in unique_names:
-                chunks_response = supabase.table("embeddings").select("*").eq("unique_name", unique_name).execute()
-                if chunks_response.data:
-                    all_chunks.extend(chunks_response.data)
+            # Get all chunks from embeddings table as fallback (every session, paged)
+            all_chunks = await fetch_chunks(unique_names)
 
             logger.info(f"Found {len(all_chunks)} fallback context chunks for project {project_id}")
             return all_chunks
@@ -452,68 +549,33 @@ class EnhancedRAGService:
             'wants_search': False
         }
 
-        # Data display patterns
-        display_patterns = [
-            'show', 'display', 'list', 'give me', 'what are', 'tell me about',
-            'find', 'get', 'retrieve', 'present', 'output'
-        ]
-
-        # Comparison patterns
-        comparison_patterns = [
-            'compare', 'difference', 'vs', 'versus', 'better', 'best', 'worst',
-            'cheaper', 'expensive', 'higher', 'lower', 'more', 'less'
-        ]
-
-        # Statistics patterns
-        stats_patterns = [
-            'how many', 'count', 'total', 'average', 'mean', 'sum', 'statistics',
-            'stats', 'number of', 'quantity'
-        ]
-
-        # Summary patterns
-        summary_patterns = [
-            'summary', 'summarize', 'overview', 'brief', 'outline', 'recap'
-        ]
-
-        # Specific item patterns
-        specific_patterns = [
-            'details about', 'information about', 'tell me about', 'what is',
-            'describe', 'explain'
-        ]
-
-        # Price patterns
-        price_patterns = [
-            'price', 'cost', 'expensive', 'cheap', 'budget', 'affordable',
-            'pricing', 'money', '$', 'dollar'
-        ]
-
         # Analyze patterns
-        if any(pattern in query_lower for pattern in display_patterns):
+        if _DISPLAY_RE.search(query_lower):
             intent['wants_data_display'] = True
             intent['type'] = 'display'
 
-        if any(pattern in query_lower for pattern in comparison_patterns):
+        if _COMPARISON_RE.search(query_lower):
             intent['wants_comparison'] = True
             intent['type'] = 'comparison'
 
-        if any(pattern in query_lower for pattern in stats_patterns):
+        if _STATS_RE.search(query_lower):
             intent['wants_statistics'] = True
             intent['wants_count'] = True
             intent['type'] = 'statistics'
 
-        if any(pattern in query_lower for pattern in summary_patterns):
+        if _SUMMARY_RE.search(query_lower):
             intent['wants_summary'] = True
             intent['type'] = 'summary'
 
-        if any(pattern in query_lower for pattern in specific_patterns):
+        if _SPECIFIC_RE.search(query_lower):
             intent['wants_specific_item'] = True
             intent['type'] = 'specific'
 
-        if any(pattern in query_lower for pattern in price_patterns):
+        if _PRICE_RE.search(query_lower):
             intent['wants_price_info'] = True
 
         # List indicators
-        if any(word in query_lower for word in ['all', 'every', 'each', 'list']):
+        if _LIST_WORDS_RE.search(query_lower):
             intent['wants_list'] = True
 
         return intent
@@ -523,13 +585,7 @@ class EnhancedRAGService:
         query_lower = query.lower()
 
         # Chart format requests - only when explicitly requested
-        explicit_chart_keywords = [
-            'chart', 'graph', 'plot', 'visualize', 'visualization',
-            'bar chart', 'pie chart', 'line chart', 'create a chart',
-            'show me a chart', 'make a chart', 'generate a chart',
-            'draw a chart', 'display a chart'
-        ]
-        if any(keyword in query_lower for keyword in explicit_chart_keywords):
+        if _EXPLICIT_CHART_RE.search(query_lower):
             return 'chart'
 
         # Explicit format requests
@@ -553,12 +609,9 @@ class EnhancedRAGService:
 
     def _extract_enhanced_keywords(self, query: str) -> List[str]:
         """Extract enhanced keywords from query using NLP techniques."""
-        # Remove common stop words
-        stop_words = {'the', 'a', 'an', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for', 'of', 'with', 'by', 'is', 'are', 'was', 'were', 'be', 'been', 'have', 'has', 'had', 'do', 'does', 'did', 'will', 'would', 'could', 'should', 'may', 'might', 'can', 'what', 'how', 'when', 'where', 'why', 'who', 'tell', 'me', 'about'}
-        
-        # Extract words and filter
+        # Extract words and filter out common stop words
         words = re.findall(r'\b\w+\b', query.lower())
-        keywords = [word for word in words if word not in stop_words and len(word) > 2]
+        keywords = [word for word in words if word not in _STOP_WORDS and len(word) > 2]
         
         # Extract named entities (proper nouns) dynamically
         proper_nouns = re.findall(r'\b[A-Z][a-z]+\b', query)
@@ -692,61 +745,62 @@ class EnhancedRAGService:
                 "max_tokens": 2048
             }
 
-            async with httpx.AsyncClient(timeout=30.0) as client:
-                response = await client.post(
-                    url,
-                    json=payload,
-                    headers={
-                        "Content-Type": "application/json",
-                        "api-key": api_key
-                    }
-                )
-
-                if response.status_code == 200:
-                    result = response.json()
-                    answer = result["choices"][0]["message"]["content"]
+            client = get_http_client()
+            response = await client.post(
+                url,
+                json=payload,
+                headers={
+                    "Content-Type": "application/json",
+                    "api-key": api_key
+                }
+            )
 
+            if response.status_code == 200:
+                result = response.json()
+                answer = result["choices"][0]["message"]["content"]
+
+                # Extract chart data if response format is chart
+                chart_data = None
+                chart_error = None
+                if response_format == 'chart':
+                    # The chart is returned as chart_data rather than text, so parse the
+                    # raw answer once instead of pretty-printing it and parsing it back
+                    chart_data = self._extract_chart_data_from_answer(answer)
+                    # For chart responses, set content to empty if we have chart data
+                    if chart_data:
+                        formatted_answer = ""
+                    else:
+                        chart_error = "Chart generation failed: LLM did not return a valid chart JSON."
+                        formatted_answer = chart_error
+                        # Log the raw answer for debugging
+                        import logging
+                        logging.error(f"Chart request failed. Raw LLM answer: {answer}")
+                else:
                     # Apply post-processing formatting
                     formatted_answer = self._apply_post_formatting(answer, response_format)
 
-                    # Extract chart data if response format is chart
-                    chart_data = None
-                    chart_error = None
-                    if response_format == 'chart':
-                        chart_data = self._extract_chart_data_from_answer(formatted_answer)
-                        # For chart responses, set content to empty if we have chart data
-                        if chart_data:
-                            formatted_answer = ""
-                        else:
-                            chart_error = "Chart generation failed: LLM did not return a valid chart JSON."
-                            formatted_answer = chart_error
-                            # Log the raw answer for debugging
-                            import logging
-                            logging.error(f"Chart request failed. Raw LLM answer: {answer}")
-
-                    # Calculate cost (approximate)
-                    usage = result.get("usage", {})
-                    total_tokens = usage.get("total_tokens", 0)
-                    cost = (total_tokens / 1000) * 0.002  # Approximate cost
+                # Calculate cost (approximate)
+                usage = result.get("usage", {})
+                total_tokens = usage.get("total_tokens", 0)
+                cost = (total_tokens / 1000) * 0.002  # Approximate cost
 
-                    return RAGQueryResponse(
-                        answer=formatted_answer,
-                        generation_cost=cost,
-                        source_documents=[],  # Will be populated by caller
-                        chart_data=chart_data
-                    )
-                else:
-                    error_msg = f"Azure OpenAI API error: {response.status_code}"
-                    return RAGQueryResponse(
-                        answer=error_msg,
-                        generation_cost=0.0,
-                        source_documents=[]
-                    )
+                return RAGQueryResponse(
+                    answer=formatted_answer,
+                    generation_cost=cost,
+                    source_documents=[],  # Will be populated by caller
+                    chart_data=chart_data
+                )
+            else:
+                error_msg = f"Azure OpenAI API error: {response.status_code}"
+                return RAGQueryResponse(
+                    answer=error_msg,
+                    generation_cost=0.0,
+                    source_documents=[]
+                )
 
         except Exception as e:
-            import traceback
-            error_details = traceback.format_exc()
-            logger.error(f"Error generating enhanced response: {str(e)}\nFull traceback: {error_details}")
+            # Only pay for traceback formatting when debugging
+            logger.error(f"Error generating enhanced response: {str(e)}", exc_info=settings.DEBUG)
             return RAGQueryResponse(
                 answer=f"I encountered an error while generating the response: {str(e)}",
                 generation_cost=0.0,
@@ -786,42 +840,41 @@ class EnhancedRAGService:
                 "max_tokens": 1024
             }
 
-            async with httpx.AsyncClient(timeout=30.0) as client:
-                response = await client.post(
-                    url,
-                    json=payload,
-                    headers={
-                        "Content-Type": "application/json",
-                        "api-key": api_key
-                    }
-                )
+            client = get_http_client()
+            response = await client.post(
+                url,
+                json=payload,
+                headers={
+                    "Content-Type": "application/json",
+                    "api-key": api_key
+                }
+            )
 
-                if response.status_code == 200:
-                    result = response.json()
-                    answer = result["choices"][0]["message"]["content"]
+            if response.status_code == 200:
+                result = response.json()
+                answer = result["choices"][0]["message"]["content"]
 
-                    # Calculate cost (approximate)
-                    usage = result.get("usage", {})
-                    total_tokens = usage.get("total_tokens", 0)
-                    cost = (total_tokens / 1000) * 0.002  # Approximate cost
+                # Calculate cost (approximate)
+                usage = result.get("usage", {})
+                total_tokens = usage.get("total_tokens", 0)
+                cost = (total_tokens / 1000) * 0.002  # Approximate cost
 
-                    return RAGQueryResponse(
-                        answer=answer,
-                        generation_cost=cost,
-                        source_documents=[]
-                    )
-                else:
-                    error_msg = f"Azure OpenAI API error: {response.status_code}"
-                    return RAGQueryResponse(
-                        answer=error_msg,
-                        generation_cost=0.0,
-                        source_documents=[]
-                    )
+                return RAGQueryResponse(
+                    answer=answer,
+                    generation_cost=cost,
+                    source_documents=[]
+                )
+            else:
+                error_msg = f"Azure OpenAI API error: {response.status_code}"
+                return RAGQueryResponse(
+                    answer=error_msg,
+                    generation_cost=0.0,
+                    source_documents=[]
+                )
 
         except Exception as e:
-            import traceback
-            error_details = traceback.format_exc()
-            logger.error(f"Error generating conversational response: {str(e)}\nFull traceback: {error_details}")
+            # Only pay for traceback formatting when debugging
+            logger.error(f"Error generating conversational response: {str(e)}", exc_info=settings.DEBUG)
             return RAGQueryResponse(
                 answer="Hello! I'm here to help you with your questions. Feel free to ask me anything!",
                 generation_cost=0.0,
@@ -957,46 +1010,21 @@ Please provide a well-formatted, helpful response based only on the available da
 
     def _enhance_chart_formatting(self, answer: str) -> str:
         """Enhance chart formatting and validate JSON structure."""
-        import json
-        import re
-
-        try:
-            # Extract JSON from the response
-            json_match = re.search(r'```json\s*(\{.*?\})\s*```', answer, re.DOTALL)
-            if json_match:
-                json_str = json_match.group(1)
-                chart_data = json.loads(json_str)
-
-                # Validate required fields
-                required_fields = ['chart_type', 'title', 'data']
-                if all(field in chart_data for field in required_fields):
-                    # Ensure proper structure
-                    if 'labels' not in chart_data['data'] and 'values' in chart_data['data']:
-                        # Generate labels if missing
-                        values = chart_data['data']['values']
-                        chart_data['data']['labels'] = [f"Item {i+1}" for i in range(len(values))]
-
-                    # Return the enhanced JSON
-                    return f"```json\n{json.dumps(chart_data, indent=2)}\n```"
-
+        chart_data = self._extract_chart_data_from_answer(answer)
+        if chart_data is None:
             # If no valid JSON found, return original
             return answer
 
-        except (json.JSONDecodeError, KeyError, TypeError):
-            # If JSON parsing fails, return original answer
-            return answer
+        # Return the enhanced JSON
+        return f"```json\n{json.dumps(chart_data, indent=2)}\n```"
 
     def _extract_chart_data_from_answer(self, answer: str) -> Optional[Dict[str, Any]]:
         """Extract chart data from the answer and return as a dictionary."""
-        import json
-        import re
-
         try:
             # Extract JSON from the response
-            json_match = re.search(r'```json\s*(\{.*?\})\s*```', answer, re.DOTALL)
+            json_match = _CHART_JSON_BLOCK_RE.search(answer)
             if json_match:
-                json_str = json_match.group(1)
-                chart_data = json.loads(json_str)
+                chart_data = json_utils.loads(json_match.group(1))
 
                 # Validate required fields
                 required_fields = ['chart_type', 'title', 'data']
@@ -10,6 +10,7 @@ matplotlib.use('Agg', force=True)
 import base64
 import io
 import json
+import logging
 import re
 from typing import Dict, List, Any, Tuple
 
@@ -17,6 +18,10 @@ from typing import Dict, List, Any, Tuple
 import matplotlib.pyplot as plt
 import numpy as np
 
+from ..config import settings
+
+logger = logging.getLogger(__name__)
+
 
 class MatplotlibChartGenerator:
     """
@@ -266,11 +271,13 @@ class MatplotlibChartGenerator:
             return [], [], "No Data Available", "No data could be extracted from the context."
         
         # Determine the field to use for values
-        numeric_fields = []
-        for item in data_items:
-            for key, value in item.items():
-                if isinstance(value, (int, float)) and key not in numeric_fields:
-                    numeric_fields.append(key)
+        # dict keys keep first-seen order with O(1) membership checks
+        numeric_fields = list(dict.fromkeys(
+            key
+            for item in data_items
+            for key, value in item.items()
+            if isinstance(value, (int, float))
+        ))
         
         
         # Use the specified sort field or find a suitable numeric field
@@ -394,6 +401,6 @@ class MatplotlibChartGenerator:
             return img_base64, chart_type
             
         except Exception as e:
-            import traceback
-            traceback.print_exc()
+            # Include the traceback only in debug mode
+            logger.error("Chart generation failed: %s", e, exc_info=settings.DEBUG)
             return "", "error"
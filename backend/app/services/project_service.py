@@ -1,15 +1,63 @@
 """
 Service for project management.
 """
-from typing import List, Optional
+import asyncio
+from typing import Dict, List, Optional
 from uuid import UUID
 
-from ..database import supabase
+from postgrest.exceptions import APIError
+
+from ..database import supabase, execute_async
 from ..models.project import ProjectCreate, ProjectUpdate, ProjectResponse
 
+# PostgREST error code for an RPC function that does not exist (migration not applied)
+FUNCTION_NOT_FOUND = "PGRST202"
+
+# Per-project count requests in flight at once when the grouped count function is missing
+SESSION_COUNT_CONCURRENCY = 4
+
 class ProjectService:
     """Service for project management."""
 
+    @staticmethod
+    async def _get_session_counts(project_ids: List[str]) -> Dict[str, int]:
+        """
+        Count scrape sessions for several projects with one grouped query.
+
+        Uses get_project_session_counts (migrations/14_add_project_session_counts_function.sql),
+        which returns the counts as a single JSON object. If the function is not
+        installed yet, falls back to per-project HEAD counts, at most
+        SESSION_COUNT_CONCURRENCY at a time so the shared executor isn't flooded.
+
+        Args:
+            project_ids (List[str]): Project IDs
+
+        Returns:
+            Dict[str, int]: Session count per project ID (missing means 0)
+        """
+        if not project_ids:
+            return {}
+        try:
+            counts_response = await execute_async(
+                supabase.rpc("get_project_session_counts", {"p_project_ids": project_ids})
+            )
+            return counts_response.data or {}
+        except APIError as e:
+            if e.code != FUNCTION_NOT_FOUND:
+                raise
+
+        semaphore = asyncio.Semaphore(SESSION_COUNT_CONCURRENCY)
+
+        async def count_sessions(project_id: str) -> int:
+            async with semaphore:
+                response = await execute_async(
+                    supabase.table("scrape_sessions").select("id", count="exact", head=True).eq("project_id", project_id)
+                )
+            return response.count or 0
+
+        counts = await asyncio.gather(*(count_sessions(project_id) for project_id in project_ids))
+        return dict(zip(project_ids, counts))
+
     async def get_user_projects(self, user_id: UUID) -> List[ProjectResponse]:
         """
         Get all projects for a specific user.
@@ -23,10 +71,11 @@ class ProjectService:
         response = supabase.table("projects").select("*").eq("user_id", str(user_id)).execute()
         projects = []
 
+        # Get scraped sessions counts for all of the user's projects in one grouped query
+        session_counts = await self._get_session_counts([project_data["id"] for project_data in response.data])
+
         for project_data in response.data:
-            # Get scraped sessions count for this project
-            sessions_response = supabase.table("scrape_sessions").select("id").eq("project_id", project_data["id"]).execute()
-            scraped_sessions_count = len(sessions_response.data)
+            scraped_sessions_count = session_counts.get(project_data["id"], 0)
 
             # Determine RAG status
             rag_status = "Enabled" if project_data.get("rag_enabled", False) else "Disabled"
@@ -52,15 +101,8 @@ class ProjectService:
         if not projects:
             return []
 
-        # OPTIMIZED: Get session counts for all projects in a single query
-        project_ids = [project["id"] for project in projects]
-        sessions_response = supabase.table("scrape_sessions").select("project_id").in_("project_id", project_ids).execute()
-
-        # Count sessions per project
-        session_counts = {}
-        for session in sessions_response.data:
-            project_id = session["project_id"]
-            session_counts[project_id] = session_counts.get(project_id, 0) + 1
+        # OPTIMIZED: Get session counts for all projects in one grouped query
+        session_counts = await self._get_session_counts([project["id"] for project in projects])
 
         # Process each project with the session count
         for project in projects:
@@ -88,8 +130,9 @@ class ProjectService:
             return None
 
         project = response.data
-        sessions_response = supabase.table("scrape_sessions").select("id").eq("project_id", str(project_id)).execute()
-        project["scraped_sessions_count"] = len(sessions_response.data)
+        # HEAD request with a server-side count instead of fetching every session id
+        sessions_response = supabase.table("scrape_sessions").select("id", count="exact", head=True).eq("project_id", str(project_id)).execute()
+        project["scraped_sessions_count"] = sessions_response.count or 0
         project["rag_status"] = "Enabled" if project["rag_enabled"] else "Disabled"
 
         # Ensure caching_enabled is present (for backward compatibility)
@@ -61,7 +61,7 @@ class ProjectUrlService:
             raise HTTPException(status_code=404, detail="Project not found")
 
         # Check if URL already exists for this project
-        url_response = supabase.table("project_urls").select("*").eq("project_id", str(project_url.project_id)).eq("url", project_url.url).execute()
+        url_response = supabase.table("project_urls").select("id").eq("project_id", str(project_url.project_id)).eq("url", project_url.url).execute()
         if url_response.data:
             # Update existing URL
             response = supabase.table("project_urls").update({
@@ -123,15 +123,14 @@ class ProjectUrlService:
         # 1. Get all scraping sessions for this URL
         sessions_response = supabase.table("scrape_sessions").select("id", "unique_scrape_identifier").eq("project_id", str(project_id)).eq("url", url_string).execute()
 
-        # 2. Delete RAG data for each session
-        for session in sessions_response.data:
-            unique_scrape_identifier = session.get("unique_scrape_identifier")
-            if unique_scrape_identifier:
-                # Optionally, log this action
-                # Delete associated embeddings
-                supabase.table("embeddings").delete().eq("unique_name", unique_scrape_identifier).execute()
-                # Delete associated markdown
-                supabase.table("markdowns").delete().eq("unique_name", unique_scrape_identifier).execute()
+        # 2. Delete RAG data for all of those sessions (one statement per table, not per session)
+        unique_scrape_identifiers = [session["unique_scrape_identifier"] for session in sessions_response.data if session.get("unique_scrape_identifier")]
+        if unique_scrape_identifiers:
+            # Optionally, log this action
+            # Delete associated embeddings
+            supabase.table("embeddings").delete().in_("unique_name", unique_scrape_identifiers).execute()
+            # Delete associated markdown
+            supabase.table("markdowns").delete().in_("unique_name", unique_scrape_identifiers).execute()
 
         # 3. Delete all scraping sessions for this URL
         supabase.table("scrape_sessions").delete().eq("project_id", str(project_id)).eq("url", url_string).execute()
@@ -4,23 +4,84 @@ Service for RAG functionality.
 from typing import List, Dict, Any, Optional
 from uuid import UUID
 from fastapi import Depends, HTTPException
+import asyncio
+import heapq
 import json
+import logging
 import os
 import re
+import time
 import uuid
+from collections import Counter
 from datetime import datetime
 from typing import Any, Dict, List, Optional, Tuple, Union
 
 
-from ..database import supabase
+from ..database import supabase, execute_async
 from ..models.chat import ChatMessageResponse, ChatMessageCreate, ChatMessageRequest, RAGQueryRequest, RAGQueryResponse
-from ..utils.text_processing import chunk_text
-from ..utils.embedding import generate_embeddings, calculate_embedding_cost, process_chunks_with_batching
+from ..utils.text_processing import chunk_text, completion_text, keyword_regex
+from ..utils.embedding import generate_embeddings, calculate_embedding_cost, process_chunks_with_batching, to_pgvector_literal
+from ..utils.http_client import get_http_client
 from ..scraper_modules.assets import AZURE_EMBEDDING_MODEL, AZURE_CHAT_MODEL # Corrected path
 from ..utils.websocket_manager import manager
 from .chat_history_service import ChatHistoryService # Corrected relative import
 from .title_generation_service import TitleGenerationService
 
+logger = logging.getLogger(__name__)
+
+# Embeddings columns needed by keyword search (skips the 1536-float vector)
+CHUNK_COLUMNS = "unique_name, chunk_id, content"
+
+# Rows requested per page when reading chunks; matches PostgREST's default max-rows
+# cap on Supabase, so a short page means the last one
+CHUNK_PAGE_SIZE = 1000
+
+# Maximum embeddings rows sent in one upsert request
+EMBEDDING_UPSERT_BATCH_SIZE = 500
+
+# Embedded batches allowed to wait for the database writer before embedding pauses
+EMBEDDING_PIPELINE_DEPTH = 2
+
+# Chart/visualization keywords, compiled once into a single alternation so a
+# query is scanned in one pass instead of one substring walk per keyword
+_CHART_REQUEST_RE = keyword_regex((
+    'chart', 'graph', 'plot', 'visualize', 'visualization', 'show me a chart',
+    'create a chart', 'bar chart', 'pie chart', 'line chart', 'line graph',
+    'bar graph', 'pie graph', 'statistics chart', 'data visualization',
+    'show chart', 'generate chart', 'make a chart', 'draw a chart'
+))
+
+async def fetch_chunks(unique_names: List[str]) -> List[Dict[str, Any]]:
+    """
+    Read every embeddings chunk (without its vector) for the given sessions.
+
+    One IN query covers all sessions, but PostgREST truncates a response at
+    its max-rows cap, so the rows are read in CHUNK_PAGE_SIZE pages (in a
+    stable order) until a short page comes back.
+
+    Args:
+        unique_names (List[str]): Session unique identifiers
+
+    Returns:
+        List[Dict[str, Any]]: Chunks with unique_name, chunk_id and content
+    """
+    chunks: List[Dict[str, Any]] = []
+    if not unique_names:
+        return chunks
+    start = 0
+    while True:
+        response = await execute_async(
+            supabase.table("embeddings").select(CHUNK_COLUMNS)
+            .in_("unique_name", unique_names)
+            .order("unique_name").order("chunk_id")
+            .range(start, start + CHUNK_PAGE_SIZE - 1)
+        )
+        page = response.data or []
+        chunks.extend(page)
+        if len(page) < CHUNK_PAGE_SIZE:
+            return chunks
+        start += CHUNK_PAGE_SIZE
+
 class RAGService:
     """Service for RAG functionality."""
 
@@ -52,6 +113,24 @@ class RAGService:
                 )
             return []
 
+    def _get_queryable_sessions(self, project_id: UUID) -> List[Dict[str, Any]]:
+        """
+        Get the sessions a RAG query should search, in one round trip.
+
+        Sessions with 'rag_ingested' status are preferred; if there are none,
+        'scraped' sessions are used since they contain the data needed for RAG.
+
+        Args:
+            project_id (UUID): Project ID
+
+        Returns:
+            List[Dict[str, Any]]: Sessions with unique_scrape_identifier, status and url
+        """
+        sessions_response = supabase.table("scrape_sessions").select("unique_scrape_identifier, status, url").eq("project_id", str(project_id)).in_("status", ["rag_ingested", "scraped"]).execute()
+        sessions = sessions_response.data or []
+        ingested = [session for session in sessions if session["status"] == "rag_ingested"]
+        return ingested or sessions
+
     async def query_rag(
         self,
         project_id: UUID,
@@ -93,37 +172,36 @@ class RAGService:
             raise HTTPException(status_code=400, detail="RAG is not enabled for this project")
 
         # Get all unique scrape identifiers for this project
-        # Look for sessions with 'rag_ingested' status first, but also accept 'scraped' sessions if project has RAG enabled
-        sessions_response = supabase.table("scrape_sessions").select("unique_scrape_identifier, status, url").eq("project_id", str(project_id)).eq("status", "rag_ingested").execute()
-
-        # If no rag_ingested sessions found, check if project has RAG enabled and look for scraped sessions
-        if not sessions_response.data:
-            # Check if project has RAG enabled
-            project_response = supabase.table("projects").select("rag_enabled").eq("id", str(project_id)).single().execute()
-            project_rag_enabled = project_response.data.get("rag_enabled", False) if project_response.data else False
-
-            if project_rag_enabled:
-                # If RAG is enabled, also accept 'scraped' sessions as they contain the data needed for RAG
-                sessions_response = supabase.table("scrape_sessions").select("unique_scrape_identifier, status, url").eq("project_id", str(project_id)).eq("status", "scraped").execute()
-                print(f"DEBUG: RAG enabled project, found {len(sessions_response.data)} scraped sessions")
-
-        # Debug: Check all sessions for this project
-        all_sessions_response = supabase.table("scrape_sessions").select("id, status, url, unique_scrape_identifier").eq("project_id", str(project_id)).execute()
-        print(f"DEBUG: All sessions for project {project_id}:")
-        for session in all_sessions_response.data:
-            print(f"  Session {session['id']}: status={session['status']}, url={session['url']}, unique_id={session.get('unique_scrape_identifier', 'None')}")
-
-        if not sessions_response.data:
+        # Use sessions with 'rag_ingested' status first, but also accept 'scraped' sessions
+        # (RAG is known to be enabled from the check above, so the project is not re-read)
+        sessions = self._get_queryable_sessions(project_id)
+        if sessions and sessions[0]["status"] == "scraped":
+            logger.debug("RAG enabled project, found %d scraped sessions", len(sessions))
+
+        # The full session listing is only needed for debug output or to explain
+        # an empty result, so skip the extra round trip on the normal path
+        all_sessions_response = None
+        if logger.isEnabledFor(logging.DEBUG) or not sessions:
+            all_sessions_response = supabase.table("scrape_sessions").select("id, status, url, unique_scrape_identifier").eq("project_id", str(project_id)).execute()
+            # Emit the whole listing as one record instead of a line per session
+            logger.debug("All sessions for project %s:\n%s", project_id, "\n".join(
+                f"  Session {session['id']}: status={session['status']}, url={session['url']}, unique_id={session.get('unique_scrape_identifier', 'None')}"
+                for session in all_sessions_response.data
+            ))
+
+        if not sessions:
             # Check if there are any sessions at all
             if not all_sessions_response.data:
                 error_msg = "No scraped data found for this project. Please scrape some URLs first."
             else:
-                scraped_count = len([s for s in all_sessions_response.data if s['status'] == 'scraped'])
-                rag_ingested_count = len([s for s in all_sessions_response.data if s['status'] == 'rag_ingested'])
+                # Tally every status in one pass instead of a filtered list per status
+                status_counts = Counter(s['status'] for s in all_sessions_response.data)
+                scraped_count = status_counts['scraped']
+                rag_ingested_count = status_counts['rag_ingested']
                 error_msg = f"No RAG-processed data available for this project. Found {len(all_sessions_response.data)} total sessions ({scraped_count} scraped, {rag_ingested_count} rag-ingested). Please ensure RAG is enabled and Azure OpenAI credentials are configured."
             raise HTTPException(status_code=400, detail=error_msg)
 
-        unique_names = [session["unique_scrape_identifier"] for session in sessions_response.data]
+        unique_names = [session["unique_scrape_identifier"] for session in sessions]
 
         # Generate embedding for the query using Azure OpenAI
         query_embedding = await generate_embeddings(query, azure_credentials)
@@ -153,13 +231,13 @@ class RAGService:
 
                     # Create source documents from fallback
                     source_documents = []
+                    source_urls = self._get_source_urls(fallback_chunks)
                     for chunk in fallback_chunks:
-                        markdown_response = supabase.table("markdowns").select("url").eq("unique_name", chunk["unique_name"]).single().execute()
-                        if markdown_response.data:
+                        if chunk["unique_name"] in source_urls:
                             source_documents.append({
                                 "content": chunk["content"],
                                 "metadata": {
-                                    "url": markdown_response.data["url"],
+                                    "url": source_urls[chunk["unique_name"]],
                                     "similarity": 0.5  # Default similarity for keyword match
                                 }
                             })
@@ -240,8 +318,6 @@ class RAGService:
 
         # Call Azure OpenAI API to generate a response
         try:
-            import httpx
-
             # Get Azure OpenAI credentials
             api_key = azure_credentials['api_key']
             endpoint = azure_credentials['endpoint']
@@ -256,11 +332,11 @@ class RAGService:
                 # Remove "/models" if it's in the endpoint
                 base_endpoint = endpoint.replace("/models", "")
                 url = f"{base_endpoint}/openai/deployments/{deployment_name}/chat/completions?api-version=2023-05-15"
-                print(f"Using Azure AI Studio chat API URL: {url}")
+                logger.debug("Using Azure AI Studio chat API URL: %s", url)
             else:
                 # Traditional Azure OpenAI format
                 url = f"{endpoint}/openai/deployments/{deployment_name}/chat/completions?api-version=2023-05-15"
-                print(f"Using Azure OpenAI chat API URL: {url}")
+                logger.debug("Using Azure OpenAI chat API URL: %s", url)
 
             # Enhanced system message for conversational AI with data capabilities
             system_message = """You are a helpful AI assistant that can have natural conversations and help users find information from scraped web data.
@@ -307,32 +383,32 @@ CONTEXT USAGE:
             }
 
             # Make the API request
-            async with httpx.AsyncClient() as client:
-                response = await client.post(
-                    url,
-                    json=payload,
-                    headers={
-                        "Content-Type": "application/json",
-                        "api-key": api_key
-                    }
-                )
+            client = get_http_client()
+            response = await client.post(
+                url,
+                json=payload,
+                headers={
+                    "Content-Type": "application/json",
+                    "api-key": api_key
+                }
+            )
 
-                if response.status_code != 200:
-                    print(f"Error from Azure OpenAI API: {response.text}")
-                    answer = "Sorry, I encountered an error while generating a response."
-                    generation_cost = 0.0
-                else:
-                    # Extract answer from response
-                    response_data = response.json()
-                    answer = response_data.get("choices", [{}])[0].get("message", {}).get("content", "")
-
-                    # Calculate approximate cost
-                    # Azure OpenAI GPT-3.5 Turbo costs approximately $0.002 per 1K tokens (input + output)
-                    # A simple approximation: 1 token ≈ 4 characters
-                    input_chars = len(context) + len(query) + 100  # Adding 100 for system message
-                    output_chars = len(answer)
-                    total_tokens = (input_chars + output_chars) / 4
-                    generation_cost = (total_tokens / 1000) * 0.002
+            if response.status_code != 200:
+                print(f"Error from Azure OpenAI API: {response.text}")
+                answer = "Sorry, I encountered an error while generating a response."
+                generation_cost = 0.0
+            else:
+                # Extract answer from response
+                response_data = response.json()
+                answer = completion_text(response_data)
+
+                # Calculate approximate cost
+                # Azure OpenAI GPT-3.5 Turbo costs approximately $0.002 per 1K tokens (input + output)
+                # A simple approximation: 1 token ≈ 4 characters
+                input_chars = len(context) + len(query) + 100  # Adding 100 for system message
+                output_chars = len(answer)
+                total_tokens = (input_chars + output_chars) / 4
+                generation_cost = (total_tokens / 1000) * 0.002
 
         except Exception as e:
             print(f"Error calling Azure OpenAI API: {e}")
@@ -341,14 +417,13 @@ CONTEXT USAGE:
 
         # Get source documents
         source_documents = []
+        source_urls = self._get_source_urls(rpc_response.data)
         for chunk in rpc_response.data:
-            # Get the URL for this chunk
-            markdown_response = supabase.table("markdowns").select("url").eq("unique_name", chunk["unique_name"]).single().execute()
-            if markdown_response.data:
+            if chunk["unique_name"] in source_urls:
                 source_documents.append({
                     "content": chunk["content"],
                     "metadata": {
-                        "url": markdown_response.data["url"],
+                        "url": source_urls[chunk["unique_name"]],
                         "similarity": chunk["similarity"]
                     }
                 })
@@ -372,6 +447,40 @@ CONTEXT USAGE:
             chart_data=chart_data
         )
 
+    async def _set_conversation_title(self, project_id: UUID, conversation_id: UUID, content: str) -> None:
+        """
+        Generate and store a title for a new conversation from its first message.
+
+        Falls back to a simple title if AI generation fails; never raises.
+
+        Args:
+            project_id (UUID): Project ID
+            conversation_id (UUID): Conversation ID
+            content (str): First user message
+        """
+        try:
+            # Generate title using AI
+            generated_title = await self.title_generation_service.generate_title(content)
+
+            # Use fallback if AI generation fails
+            if not generated_title:
+                generated_title = self.title_generation_service.generate_fallback_title(content)
+
+            # Update conversation with the generated title
+            await self.chat_history_service.update_conversation_title(
+                project_id, conversation_id, generated_title
+            )
+        except Exception as e:
+            # If title generation fails, use fallback
+            fallback_title = self.title_generation_service.generate_fallback_title(content)
+            try:
+                await self.chat_history_service.update_conversation_title(
+                    project_id, conversation_id, fallback_title
+                )
+            except Exception:
+                # If even fallback fails, continue without title
+                pass
+
     async def post_chat_message(
         self,
         project_id: UUID,
@@ -404,69 +513,55 @@ CONTEXT USAGE:
         if not azure_credentials["api_key"] or not azure_credentials["endpoint"]:
             raise HTTPException(status_code=500, detail="Azure OpenAI credentials not configured in environment variables")
 
-        # Create or use existing conversation
+        # Create or use existing conversation. A conversation created here has no user
+        # messages yet, so only an existing one needs the first-message probe
         if not conversation_id:
             conversation_id = await self.chat_history_service.create_conversation(project_id, session_id)
+            is_first_message = True
+        else:
+            is_first_message = await self.chat_history_service.is_first_user_message(project_id, conversation_id)
 
-        # Check if this is the first user message in the conversation
-        is_first_message = await self.chat_history_service.is_first_user_message(project_id, conversation_id)
-
-        # Save user message
+        # Save user message (one timestamp shared by the stored row and the response)
+        user_sent_at = datetime.now()
         user_message_id = await self.chat_history_service.save_message(
             project_id=project_id,
             conversation_id=conversation_id,
             session_id=session_id,
             role="user",
             content=content,
-            metadata={"timestamp": datetime.now().isoformat()}
+            metadata={"timestamp": user_sent_at.isoformat()}
         )
 
-        # Generate conversation title if this is the first user message
-        if is_first_message:
-            try:
-                # Generate title using AI
-                generated_title = await self.title_generation_service.generate_title(content)
-
-                # Use fallback if AI generation fails
-                if not generated_title:
-                    generated_title = self.title_generation_service.generate_fallback_title(content)
-
-                # Update conversation with the generated title
-                await self.chat_history_service.update_conversation_title(
-                    project_id, conversation_id, generated_title
-                )
-            except Exception as e:
-                # If title generation fails, use fallback
-                fallback_title = self.title_generation_service.generate_fallback_title(content)
-                try:
-                    await self.chat_history_service.update_conversation_title(
-                        project_id, conversation_id, fallback_title
-                    )
-                except Exception:
-                    # If even fallback fails, continue without title
-                    pass
-
         # Create user message
         user_message = ChatMessageResponse(
             id=str(user_message_id),
             role="user",
             content=content,
-            timestamp=datetime.now()
+            timestamp=user_sent_at
         )
 
         # Always use the correct chat model
         deployment_name = AZURE_CHAT_MODEL
 
-        # Query RAG using Azure OpenAI
-        rag_response = await self.query_rag(
+        # Query RAG using Azure OpenAI; the title for a new conversation is an
+        # independent LLM call, so generate it at the same time
+        rag_query = self.query_rag(
             project_id,
             content,
             deployment_name,
             conversation_id,
             session_id
         )
+        if is_first_message:
+            rag_response, _ = await asyncio.gather(
+                rag_query,
+                self._set_conversation_title(project_id, conversation_id, content)
+            )
+        else:
+            rag_response = await rag_query
 
         # Save assistant message
+        answered_at = datetime.now()
         assistant_message_id = await self.chat_history_service.save_message(
             project_id=project_id,
             conversation_id=conversation_id,
@@ -477,7 +572,7 @@ CONTEXT USAGE:
                 "cost": rag_response.generation_cost,
                 "sources": [doc["metadata"]["url"] for doc in rag_response.source_documents] if rag_response.source_documents else [],
                 "model": deployment_name,
-                "timestamp": datetime.now().isoformat(),
+                "timestamp": answered_at.isoformat(),
                 "chart_data": rag_response.chart_data  # Include chart data in metadata
             }
         )
@@ -487,7 +582,7 @@ CONTEXT USAGE:
             id=str(assistant_message_id),
             role="assistant",
             content=rag_response.answer,
-            timestamp=datetime.now(),
+            timestamp=answered_at,
             cost=rag_response.generation_cost,
             sources=[doc["metadata"]["url"] for doc in rag_response.source_documents] if rag_response.source_documents else None,
             chart_data=rag_response.chart_data  # Include chart data from RAG response
@@ -542,21 +637,17 @@ CONTEXT USAGE:
             if not project_response.data["rag_enabled"]:
                 raise HTTPException(status_code=400, detail="RAG is not enabled for this project")
 
-            # Get sessions with RAG data
-            sessions_response = supabase.table("scrape_sessions").select("unique_scrape_identifier, status, url").eq("project_id", str(project_id)).eq("status", "rag_ingested").execute()
-
-            if not sessions_response.data:
-                # Try to find scraped sessions if no rag_ingested sessions
-                sessions_response = supabase.table("scrape_sessions").select("unique_scrape_identifier, status, url").eq("project_id", str(project_id)).eq("status", "scraped").execute()
+            # Get sessions with RAG data (falls back to scraped sessions if none are rag_ingested)
+            sessions = self._get_queryable_sessions(project_id)
 
-            if not sessions_response.data:
+            if not sessions:
                 return RAGQueryResponse(
                     answer="No RAG-processed data available for this project. Please ensure content has been scraped and RAG ingestion is complete.",
                     generation_cost=0.0,
                     source_documents=[]
                 )
 
-            unique_names = [session["unique_scrape_identifier"] for session in sessions_response.data]
+            unique_names = [session["unique_scrape_identifier"] for session in sessions]
 
             # Use keyword fallback search since we don't have OpenAI embeddings
             fallback_chunks = await self._keyword_fallback_search(unique_names, query)
@@ -588,13 +679,13 @@ CONTEXT USAGE:
 
             # Create source documents
             source_documents = []
+            source_urls = self._get_source_urls(fallback_chunks)
             for chunk in fallback_chunks:
-                markdown_response = supabase.table("markdowns").select("url").eq("unique_name", chunk["unique_name"]).single().execute()
-                if markdown_response.data:
+                if chunk["unique_name"] in source_urls:
                     source_documents.append({
                         "content": chunk["content"],
                         "metadata": {
-                            "url": markdown_response.data["url"],
+                            "url": source_urls[chunk["unique_name"]],
                             "similarity": chunk.get("similarity", 0.5)
                         }
                     })
@@ -654,7 +745,7 @@ CONTEXT USAGE:
                     supabase.table("project_urls").update({"status": "failed"}).eq("id", str(project_url_id)).execute()
                 return False
 
-            session_response = supabase.table("scrape_sessions").select("*").eq("id", str(session_id)).single().execute()
+            session_response = supabase.table("scrape_sessions").select("url, unique_scrape_identifier").eq("id", str(session_id)).single().execute()
             if not session_response.data:
                 await manager.update_progress(
                     str(project_id), str(session_id),
@@ -696,9 +787,10 @@ CONTEXT USAGE:
                     {"status": "processing", "message": "Using full markdown content for RAG ingestion", "current_chunk": 0, "total_chunks": 0, "percent_complete": 0}
                 )
 
-            markdown_response = supabase.table("markdowns").insert({
+            # Upsert on unique_name so re-ingesting a session overwrites instead of failing
+            markdown_response = await execute_async(supabase.table("markdowns").upsert({
                 "unique_name": unique_scrape_identifier, "url": url, "markdown": content_to_ingest
-            }).execute()
+            }, on_conflict="unique_name"))
 
             if not markdown_response.data:
                 await manager.update_progress(
@@ -717,30 +809,60 @@ CONTEXT USAGE:
                 {"status": "processing", "message": "Starting RAG ingestion...", "current_chunk": 0, "total_chunks": total_chunks, "percent_complete": 0}
             )
             
-            start_time = time.time()
+            start_time = time.perf_counter()
             await manager.update_progress(
                 str(project_id), str(session_id),
                 {"status": "processing", "message": f"Processing {total_chunks} chunks in batches...", "current_chunk": 0, "total_chunks": total_chunks, "percent_complete": 5}
             )
 
-            embeddings = await process_chunks_with_batching(chunks, azure_credentials)
-            processing_time = time.time() - start_time
-            chunks_per_second = total_chunks / processing_time if processing_time > 0 else 0
+            # Embed and store in overlapping stages: while one batch is being written,
+            # the next one is already being embedded
+            batches: asyncio.Queue = asyncio.Queue(maxsize=EMBEDDING_PIPELINE_DEPTH)
+
+            async def embed_batches():
+                for start in range(0, total_chunks, EMBEDDING_UPSERT_BATCH_SIZE):
+                    batch = chunks[start:start + EMBEDDING_UPSERT_BATCH_SIZE]
+                    await batches.put((start, batch, await process_chunks_with_batching(batch, azure_credentials)))
+                await batches.put(None)
+
+            async def store_batches():
+                while (item := await batches.get()) is not None:
+                    start, batch, embeddings = item
+                    # Bulk upsert instead of one insert per chunk, sized so a batch
+                    # doesn't exceed PostgREST's request body limit; run off the event loop
+                    await execute_async(supabase.table("embeddings").upsert([
+                        {"unique_name": unique_scrape_identifier, "chunk_id": start + i, "content": chunk, "embedding": to_pgvector_literal(embedding)}
+                        for i, (chunk, embedding) in enumerate(zip(batch, embeddings))
+                    ], on_conflict="unique_name,chunk_id"))
+                    done = start + len(batch)
+                    await manager.update_progress(
+                        str(project_id), str(session_id),
+                        {"status": "processing", "message": f"Stored embeddings for {done} of {total_chunks} chunks", "current_chunk": done, "total_chunks": total_chunks, "percent_complete": 5 + int(85 * done / total_chunks)}
+                    )
 
-            await manager.update_progress(
-                str(project_id), str(session_id),
-                {"status": "processing", "message": f"Batch processing complete. Processed {total_chunks} chunks in {processing_time:.2f} seconds ({chunks_per_second:.2f} chunks/sec)", "current_chunk": total_chunks, "total_chunks": total_chunks, "percent_complete": 80}
+            # TaskGroup cancels the other stage if one fails, so neither waits forever on the queue
+            try:
+                async with asyncio.TaskGroup() as task_group:
+                    task_group.create_task(embed_batches())
+                    task_group.create_task(store_batches())
+            except ExceptionGroup as error_group:
+                # Report the stage's own error rather than the group wrapper
+                raise error_group.exceptions[0]
+
+            # Upserts only overwrite chunk_ids 0..N-1; drop rows a previous, larger
+            # ingest of this session left behind so they are no longer retrieved
+            await execute_async(
+                supabase.table("embeddings").delete().eq("unique_name", unique_scrape_identifier).gte("chunk_id", total_chunks)
             )
+
+            processing_time = time.perf_counter() - start_time
+            chunks_per_second = total_chunks / processing_time if processing_time > 0 else 0
+
             await manager.update_progress(
                 str(project_id), str(session_id),
-                {"status": "processing", "message": "Storing embeddings in database...", "current_chunk": total_chunks, "total_chunks": total_chunks, "percent_complete": 90}
+                {"status": "processing", "message": f"Batch processing complete. Processed {total_chunks} chunks in {processing_time:.2f} seconds ({chunks_per_second:.2f} chunks/sec)", "current_chunk": total_chunks, "total_chunks": total_chunks, "percent_complete": 95}
             )
 
-            for i, (chunk, embedding) in enumerate(zip(chunks, embeddings)):
-                supabase.table("embeddings").insert({
-                    "unique_name": unique_scrape_identifier, "chunk_id": i, "content": chunk, "embedding": embedding
-                }).execute()
-
             supabase.table("scrape_sessions").update({"status": "rag_ingested"}).eq("id", str(session_id)).execute()
             
             if project_url_id: # Update project_urls status to completed
@@ -815,7 +937,7 @@ CONTEXT USAGE:
         
         # If no meaningful content was created, fall back to a basic representation
         if len(final_text.strip()) == 0 or final_text.strip() == "#":
-            final_text = f"Structured data containing {len(tabular_data)} items with the following information:\n\n"
+            summary_lines = [f"Structured data containing {len(tabular_data)} items with the following information:\n"]
             if tabular_data:
                 # Create a summary of all available fields and their values
                 all_fields = set()
@@ -825,10 +947,32 @@ CONTEXT USAGE:
                 for field in all_fields:
                     values = [str(row.get(field, "")) for row in tabular_data if row.get(field)]
                     if values:
-                        final_text += f"**{field.replace('_', ' ').title()}:** {', '.join(values[:3])}{'...' if len(values) > 3 else ''}\n"
+                        summary_lines.append(f"**{field.replace('_', ' ').title()}:** {', '.join(values[:3])}{'...' if len(values) > 3 else ''}")
+            # Build the lines first and join once instead of growing the string with +=
+            final_text = "".join(f"{line}\n" for line in summary_lines)
         
         return final_text
 
+    def _get_source_urls(self, chunks: List[Dict[str, Any]]) -> Dict[str, str]:
+        """
+        Look up the source URL for every document referenced by the chunks.
+
+        All lookups go out as a single markdowns query instead of one
+        round trip per chunk.
+
+        Args:
+            chunks (List[Dict[str, Any]]): Matched chunks with a 'unique_name' key
+
+        Returns:
+            Dict[str, str]: Mapping of unique_name to source URL
+        """
+        unique_names = list({chunk["unique_name"] for chunk in chunks})
+        if not unique_names:
+            return {}
+
+        markdown_response = supabase.table("markdowns").select("unique_name, url").in_("unique_name", unique_names).execute()
+        return {row["unique_name"]: row["url"] for row in markdown_response.data or []}
+
     async def _keyword_fallback_search(self, unique_names: List[str], query: str) -> List[Dict[str, Any]]:
         """
         Fallback search using keyword matching for structured data.
@@ -845,12 +989,8 @@ CONTEXT USAGE:
             query_lower = query.lower()
             keywords = [word.strip() for word in query_lower.split() if len(word.strip()) > 2]
 
-            # Get all chunks for the unique names
-            all_chunks = []
-            for unique_name in unique_names:
-                chunks_response = supabase.table("embeddings").select("*").eq("unique_name", unique_name).execute()
-                if chunks_response.data:
-                    all_chunks.extend(chunks_response.data)
+            # Get all chunks for the unique names, paged past the max-rows cap
+            all_chunks = await fetch_chunks(unique_names)
 
             # Score chunks based on keyword matches
             scored_chunks = []
@@ -873,9 +1013,8 @@ CONTEXT USAGE:
                     chunk["similarity"] = score / len(keywords) if keywords else 0.5
                     scored_chunks.append(chunk)
 
-            # Sort by score and return top matches
-            scored_chunks.sort(key=lambda x: x["similarity"], reverse=True)
-            return scored_chunks[:3]  # Return top 3 matches
+            # Return the top 3 matches without sorting every scored chunk
+            return heapq.nlargest(3, scored_chunks, key=lambda x: x["similarity"])
 
         except Exception as e:
             print(f"Error in keyword fallback search: {e}")
@@ -894,8 +1033,6 @@ CONTEXT USAGE:
             str: Generated response
         """
         try:
-            import httpx
-
             # Get Azure OpenAI credentials
             api_key = azure_credentials['api_key']
             endpoint = azure_credentials['endpoint']
@@ -946,22 +1083,22 @@ CONTEXT USAGE:
                 "max_tokens": 1024
             }
 
-            async with httpx.AsyncClient() as client:
-                response = await client.post(
-                    url,
-                    json=payload,
-                    headers={
-                        "Content-Type": "application/json",
-                        "api-key": api_key
-                    }
-                )
+            client = get_http_client()
+            response = await client.post(
+                url,
+                json=payload,
+                headers={
+                    "Content-Type": "application/json",
+                    "api-key": api_key
+                }
+            )
 
-                if response.status_code != 200:
-                    print(f"Error from Azure OpenAI API: {response.text}")
-                    return "Sorry, I encountered an error while generating a response."
+            if response.status_code != 200:
+                print(f"Error from Azure OpenAI API: {response.text}")
+                return "Sorry, I encountered an error while generating a response."
 
-                response_data = response.json()
-                return response_data.get("choices", [{}])[0].get("message", {}).get("content", "")
+            response_data = response.json()
+            return completion_text(response_data)
 
         except Exception as e:
             print(f"Error generating response: {e}")
@@ -979,8 +1116,6 @@ CONTEXT USAGE:
             str: Generated conversational response
         """
         try:
-            import httpx
-
             # Get Azure OpenAI credentials
             api_key = azure_credentials['api_key']
             endpoint = azure_credentials['endpoint']
@@ -1014,22 +1149,22 @@ CONTEXT USAGE:
                 "max_tokens": 512
             }
 
-            async with httpx.AsyncClient() as client:
-                response = await client.post(
-                    url,
-                    json=payload,
-                    headers={
-                        "Content-Type": "application/json",
-                        "api-key": api_key
-                    }
-                )
+            client = get_http_client()
+            response = await client.post(
+                url,
+                json=payload,
+                headers={
+                    "Content-Type": "application/json",
+                    "api-key": api_key
+                }
+            )
 
-                if response.status_code != 200:
-                    print(f"Error from Azure OpenAI API: {response.text}")
-                    return "Hello! I'm here to help you with your scraped data. What would you like to know?"
+            if response.status_code != 200:
+                print(f"Error from Azure OpenAI API: {response.text}")
+                return "Hello! I'm here to help you with your scraped data. What would you like to know?"
 
-                response_data = response.json()
-                return response_data.get("choices", [{}])[0].get("message", {}).get("content", "")
+            response_data = response.json()
+            return completion_text(response_data)
 
         except Exception as e:
             print(f"Error generating conversational response: {e}")
@@ -1048,8 +1183,6 @@ CONTEXT USAGE:
             str: Generated conversational response
         """
         try:
-            import httpx
-
             url = "https://api.openai.com/v1/chat/completions"
 
             system_message = """You are a helpful AI assistant for a web scraping and data analysis platform.
@@ -1071,22 +1204,22 @@ CONTEXT USAGE:
                 "max_tokens": 512
             }
 
-            async with httpx.AsyncClient() as client:
-                response = await client.post(
-                    url,
-                    json=payload,
-                    headers={
-                        "Content-Type": "application/json",
-                        "Authorization": f"Bearer {api_key}"
-                    }
-                )
+            client = get_http_client()
+            response = await client.post(
+                url,
+                json=payload,
+                headers={
+                    "Content-Type": "application/json",
+                    "Authorization": f"Bearer {api_key}"
+                }
+            )
 
-                if response.status_code != 200:
-                    print(f"Error from OpenAI API: {response.text}")
-                    return "Hello! I'm here to help you with your scraped data. What would you like to know?"
+            if response.status_code != 200:
+                print(f"Error from OpenAI API: {response.text}")
+                return "Hello! I'm here to help you with your scraped data. What would you like to know?"
 
-                response_data = response.json()
-                return response_data.get("choices", [{}])[0].get("message", {}).get("content", "")
+            response_data = response.json()
+            return completion_text(response_data)
 
         except Exception as e:
             print(f"Error generating OpenAI conversational response: {e}")
@@ -1106,8 +1239,6 @@ CONTEXT USAGE:
             str: Generated response
         """
         try:
-            import httpx
-
             url = "https://api.openai.com/v1/chat/completions"
 
             system_message = """You are a helpful AI assistant that can have natural conversations and help users find information from scraped web data.
@@ -1146,22 +1277,22 @@ CONTEXT USAGE:
                 "max_tokens": 1024
             }
 
-            async with httpx.AsyncClient() as client:
-                response = await client.post(
-                    url,
-                    json=payload,
-                    headers={
-                        "Content-Type": "application/json",
-                        "Authorization": f"Bearer {api_key}"
-                    }
-                )
+            client = get_http_client()
+            response = await client.post(
+                url,
+                json=payload,
+                headers={
+                    "Content-Type": "application/json",
+                    "Authorization": f"Bearer {api_key}"
+                }
+            )
 
-                if response.status_code != 200:
-                    print(f"Error from OpenAI API: {response.text}")
-                    return "Sorry, I encountered an error while generating a response."
+            if response.status_code != 200:
+                print(f"Error from OpenAI API: {response.text}")
+                return "Sorry, I encountered an error while generating a response."
 
-                response_data = response.json()
-                return response_data.get("choices", [{}])[0].get("message", {}).get("content", "")
+            response_data = response.json()
+            return completion_text(response_data)
 
         except Exception as e:
             print(f"Error generating OpenAI response: {e}")
@@ -1179,8 +1310,6 @@ CONTEXT USAGE:
             str: Generated conversation title
         """
         try:
-            import httpx
-
             # Get Azure OpenAI credentials
             api_key = azure_credentials['api_key']
             endpoint = azure_credentials['endpoint']
@@ -1235,29 +1364,29 @@ Generate ONLY the title, nothing else."""
                 "max_tokens": 20  # Short titles only
             }
 
-            async with httpx.AsyncClient() as client:
-                response = await client.post(
-                    url,
-                    json=payload,
-                    headers={
-                        "Content-Type": "application/json",
-                        "api-key": api_key
-                    }
-                )
+            client = get_http_client()
+            response = await client.post(
+                url,
+                json=payload,
+                headers={
+                    "Content-Type": "application/json",
+                    "api-key": api_key
+                }
+            )
 
-                if response.status_code != 200:
-                    print(f"Error generating conversation title: {response.text}")
-                    return "General Discussion"
+            if response.status_code != 200:
+                print(f"Error generating conversation title: {response.text}")
+                return "General Discussion"
 
-                response_data = response.json()
-                title = response_data.get("choices", [{}])[0].get("message", {}).get("content", "").strip()
+            response_data = response.json()
+            title = completion_text(response_data).strip()
 
-                # Clean up the title
-                title = title.replace('"', '').replace("'", "").strip()
-                if not title or len(title) > 50:
-                    return "General Discussion"
+            # Clean up the title
+            title = title.replace('"', '').replace("'", "").strip()
+            if not title or len(title) > 50:
+                return "General Discussion"
 
-                return title
+            return title
 
         except Exception as e:
             print(f"Error generating conversation title: {e}")
@@ -1319,12 +1448,4 @@ Generate ONLY the title, nothing else."""
         Returns:
             bool: True if it's a chart request
         """
-        query_lower = query.lower()
-        chart_keywords = [
-            'chart', 'graph', 'plot', 'visualize', 'visualization', 'show me a chart',
-            'create a chart', 'bar chart', 'pie chart', 'line chart', 'line graph',
-            'bar graph', 'pie graph', 'statistics chart', 'data visualization',
-            'show chart', 'generate chart', 'make a chart', 'draw a chart'
-        ]
-
-        return any(keyword in query_lower for keyword in chart_keywords)
+        return _CHART_REQUEST_RE.search(query.lower()) is not None
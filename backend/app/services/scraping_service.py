@@ -5,16 +5,19 @@ from typing import List, Optional, Dict, Any
 from uuid import UUID, uuid4
 from fastapi import Depends, BackgroundTasks, HTTPException, Response
 from datetime import datetime
-import json
 import csv
 import io
+import re
 import asyncio # Added for loop.run_in_executor
+import logging
 import os # Added for os.environ manipulation
 
-from ..database import supabase
+from ..database import supabase, execute_async
+from ..config import settings
 from ..models.scrape_session import ScrapedSessionResponse, InteractiveScrapingResponse, ExecuteScrapeResponse, ExecuteScrapeRequest
 from ..utils.browser_control import launch_browser_session # Keep for interactive, if still used
 from ..utils.text_processing import format_data_for_display # Added import
+from ..utils import json_utils
 
 # New imports from Scrape_Master modules
 from ..scraper_modules.markdown import fetch_and_store_markdowns, read_raw_data
@@ -29,6 +32,25 @@ from .rag_service import RAGService
 # If format_data_for_display is crucial, it needs to be re-evaluated.
 # For structure_scraped_data, its role is now taken by new_scrape_structured_data + LLM call.
 
+logger = logging.getLogger(__name__)
+
+# Field names treated as the item's name by the fallback extractor
+_FALLBACK_NAME_FIELDS = frozenset({'name', 'country', 'title', 'item_name', 'product_name'})
+
+# Declarative field-alias -> pattern table for the fallback extractor (countries page format)
+_FALLBACK_FIELD_PATTERNS = (
+    (frozenset({'capital', 'city'}), re.compile(r'\*\*Capital:\*\*\s*([^*]+?)(?:\s*\*\*|$)')),
+    (frozenset({'population', 'people', 'inhabitants'}), re.compile(r'\*\*Population:\*\*\s*([^*]+?)(?:\s*\*\*|$)')),
+    (frozenset({'area', 'size', 'surface', 'land_area'}), re.compile(r'\*\*Area \([^)]*\):\*\*\s*([^*]+?)(?:\s*\*\*|$)')),
+)
+
+# Comma separator for the project_urls.conditions field list, swallowing surrounding whitespace
+_CONDITIONS_SEPARATOR = re.compile(r'\s*,\s*')
+
+def _split_conditions(conditions: Optional[str]) -> List[str]:
+    """Split a comma-separated conditions string into stripped field names."""
+    return _CONDITIONS_SEPARATOR.split(conditions.strip()) if conditions else []
+
 class ScrapingService:
     """Service for web scraping."""
 
@@ -52,30 +74,24 @@ class ScrapingService:
         if not project_urls_response.data:
             return []
 
+        # Fetch every URL's latest session in one query instead of one per URL
+        session_ids = [pu_entry["last_scraped_session_id"] for pu_entry in project_urls_response.data if pu_entry.get("last_scraped_session_id")]
+        sessions_by_id = {}
+        if session_ids:
+            try:
+                sessions_response = supabase.table("scrape_sessions").select(
+                    "id, project_id, url, scraped_at, status, raw_markdown, structured_data_json, display_format, formatted_tabular_data"
+                ).in_("id", session_ids).eq("project_id", str(project_id)).execute()
+                sessions_by_id = {session["id"]: session for session in sessions_response.data or []}
+            except Exception as e:
+                logger.error("Error fetching session data for project %s: %s", project_id, e, exc_info=True)
+
         results = []
         for pu_entry in project_urls_response.data:
             session_data_for_model = {}
-            raw_session_data = None
-
-            # Get the session data separately if last_scraped_session_id exists
-            if pu_entry.get("last_scraped_session_id"):
-                try:
-                    session_response = supabase.table("scrape_sessions").select(
-                        "id, project_id, url, scraped_at, status, raw_markdown, structured_data_json, display_format, formatted_tabular_data"
-                    ).eq("id", pu_entry["last_scraped_session_id"]).eq("project_id", str(project_id)).single().execute()
-
-                    if session_response.data:
-                        raw_session_data = session_response.data
-                        print(f"Found session data for URL {pu_entry['url']}: {raw_session_data['id']}")
-                except Exception as e:
-                    print(f"Error fetching session data for {pu_entry['url']}: {e}")
-                    raw_session_data = None
+            raw_session_data = sessions_by_id.get(pu_entry.get("last_scraped_session_id"))
 
             if raw_session_data and isinstance(raw_session_data, dict) and raw_session_data.get("id"):
-                print(f"Processing session data for URL {pu_entry['url']}: {raw_session_data['id']}")
-                print(f"Session has raw_markdown: {bool(raw_session_data.get('raw_markdown'))}")
-                print(f"Session has structured_data_json: {bool(raw_session_data.get('structured_data_json'))}")
-
                 # Copy raw data to prepare for model instantiation
                 session_data_for_model = dict(raw_session_data)
 
@@ -84,12 +100,12 @@ class ScrapingService:
 
                 # Get fields from project_urls.conditions first, as this is the source of truth for desired columns
                 conditions_str = pu_entry.get("conditions", "")
-                session_fields = [field.strip() for field in conditions_str.split(',')] if conditions_str else []
+                session_fields = _split_conditions(conditions_str)
                 session_data_for_model["fields"] = session_fields
 
                 if "structured_data_json" in session_data_for_model and session_data_for_model["structured_data_json"]:
                     try:
-                        structured_data = json.loads(session_data_for_model["structured_data_json"])
+                        structured_data = json_utils.parse_json_field(session_data_for_model["structured_data_json"])
                         session_data_for_model["structured_data"] = structured_data  # Keep the parsed dict
                         
                         current_tabular_data = []
@@ -124,7 +140,7 @@ class ScrapingService:
                     try:
                         # Ensure it's a string before trying to load if it might already be parsed by some Supabase clients
                         if isinstance(session_data_for_model["formatted_tabular_data"], str):
-                           session_data_for_model["formatted_tabular_data"] = json.loads(session_data_for_model["formatted_tabular_data"])
+                           session_data_for_model["formatted_tabular_data"] = json_utils.loads(session_data_for_model["formatted_tabular_data"])
                         # If it's already a dict (parsed by Supabase client), use as is.
                         elif not isinstance(session_data_for_model["formatted_tabular_data"], dict):
                             print(f"Warning: formatted_tabular_data for session {session_data_for_model.get('id')} is not a string or dict. Type: {type(session_data_for_model['formatted_tabular_data'])}")
@@ -155,20 +171,22 @@ class ScrapingService:
             final_session_data_obj = None
             if session_data_for_model and session_data_for_model.get("id"):
                 try:
-                    print(f"Attempting to create ScrapedSessionResponse for session {session_data_for_model.get('id')}")
-                    print(f"Session data keys: {list(session_data_for_model.keys())}")
                     final_session_data_obj = ScrapedSessionResponse(**session_data_for_model)
-                    print(f"✓ Successfully created ScrapedSessionResponse")
                 except Exception as e: # Catch Pydantic validation error
                     print(f"✗ Pydantic validation error for session {session_data_for_model.get('id')}: {e}")
                     print(f"Session data for debugging: {session_data_for_model}")
                     # Continue without the session data rather than failing completely
                     final_session_data_obj = None
             
-            print(f"Adding result with latest_scrape_data: {type(final_session_data_obj)}")
-            if final_session_data_obj:
-                print(f"Session object has raw_markdown: {bool(getattr(final_session_data_obj, 'markdown_content', None))}")
-                print(f"Session object has structured_data: {bool(getattr(final_session_data_obj, 'structured_data', None))}")
+            # One record per URL instead of a handful of prints
+            logger.debug(
+                "URL %s: session=%s raw_markdown=%s structured_data=%s latest_scrape_data=%s",
+                pu_entry['url'],
+                session_data_for_model.get("id"),
+                bool(session_data_for_model.get("raw_markdown")),
+                bool(session_data_for_model.get("structured_data_json")),
+                type(final_session_data_obj).__name__,
+            )
 
             results.append({
                 **pu_data_cleaned,
@@ -228,7 +246,7 @@ class ScrapingService:
             HTTPException: If project not found or scraping fails
         """
         # Check if project exists and get RAG status and user_id
-        project_response = supabase.table("projects").select("*").eq("id", str(project_id)).single().execute()
+        project_response = supabase.table("projects").select("rag_enabled, user_id, caching_enabled").eq("id", str(project_id)).single().execute()
         if not project_response.data:
             raise HTTPException(status_code=404, detail="Project not found")
 
@@ -263,7 +281,7 @@ class ScrapingService:
         # Manage project_urls entry
         project_url_entry = None
         try:
-            project_url_response = supabase.table("project_urls").select("*").eq("project_id", str(project_id)).eq("url", current_page_url).execute()
+            project_url_response = supabase.table("project_urls").select("id, rag_enabled, last_scraped_session_id, conditions").eq("project_id", str(project_id)).eq("url", current_page_url).execute()
             if project_url_response.data and len(project_url_response.data) > 0:
                 project_url_entry = project_url_response.data[0]
                 rag_enabled_for_url = project_url_entry.get("rag_enabled", rag_enabled_for_project) # Use URL specific RAG setting if available
@@ -345,7 +363,7 @@ class ScrapingService:
         if not conditions_str: # Fallback to default
             conditions_str = "title, description, price, content" # Default from old logic
         
-        fields = [field.strip() for field in conditions_str.split(',')] # Renamed fields_list to fields
+        fields = _split_conditions(conditions_str) # Renamed fields_list to fields
 
         # Update conditions in project_urls if they changed or were defaulted
         if project_url_entry and project_url_entry.get("conditions") != conditions_str:
@@ -376,17 +394,19 @@ class ScrapingService:
             # unique_scrape_identifier will be generated by Supabase trigger or set if needed
         }
 
-        print(f"🔄 Creating session with ID: {current_session_id}")
+        logger.info("Creating session with ID: %s", current_session_id)
         session_response = supabase.table("scrape_sessions").insert(session_data).execute()
         if not session_response.data:
-            print(f"❌ Failed to create session - no data returned")
+            logger.error("Failed to create session - no data returned")
             if project_url_entry:
                 supabase.table("project_urls").update({"status": "failed"}).eq("id", project_url_entry["id"]).execute()
             raise HTTPException(status_code=500, detail="Failed to create scrape session")
 
         created_session = session_response.data[0]
-        print(f"✅ Session created successfully: {created_session['id']}")
-        print(f"📝 Session unique_scrape_identifier: {created_session.get('unique_scrape_identifier', 'N/A')}")
+        logger.info(
+            "Session created successfully: %s (unique_scrape_identifier: %s)",
+            created_session['id'], created_session.get('unique_scrape_identifier', 'N/A')
+        )
 
         # 3. Parse structured data using LLM via new_scrape_structured_data
         # Use gpt-4o - excellent accuracy for data extraction
@@ -415,7 +435,7 @@ class ScrapingService:
         content_too_large = len(markdown_content) > 50000
 
         if content_too_large:
-            print(f"Content is large ({len(markdown_content)} chars), using fallback extraction even with Azure credentials")
+            logger.info("Content is large (%d chars), using fallback extraction even with Azure credentials", len(markdown_content))
             use_azure_for_structuring = False
 
         if use_azure_for_structuring:
@@ -437,68 +457,66 @@ class ScrapingService:
             # Also set the OPENAI_API_KEY for the Scrape_Master module compatibility
             os.environ["OPENAI_API_KEY"] = azure_api_key
         else:
-            print("Azure OpenAI credentials not provided, using fallback data structuring")
+            logger.info("Azure OpenAI credentials not provided, using fallback data structuring")
 
         structured_data_results = None
-        print(f"🧠 Starting LLM processing with Azure: {use_azure_for_structuring}")
+        logger.info("Starting LLM processing with Azure: %s", use_azure_for_structuring)
         try:
             if use_azure_for_structuring:
-                print(f"🔑 Using Azure OpenAI for data structuring")
-                print(f"📊 Content length: {len(markdown_content)} chars")
-                print(f"🎯 Fields to extract: {fields}")
-                print(f"🤖 Model: {selected_model_name}")
+                logger.info(
+                    "Using Azure OpenAI for data structuring: %d chars, fields=%s, model=%s",
+                    len(markdown_content), fields, selected_model_name
+                )
 
                 # Use Azure OpenAI for data structuring
                 # new_scrape_structured_data returns: total_input_tokens, total_output_tokens, total_cost, parsed_results
                 # parsed_results is a list of dicts: [{"unique_name": uniq, "parsed_data": parsed}]
-                print(f"🚀 Calling LLM with unique_name: {unique_name}")
+                logger.debug("Calling LLM with unique_name: %s", unique_name)
                 _, _, _, parsed_results_list = await loop.run_in_executor(None, new_scrape_structured_data, [unique_name], fields, selected_model_name) # Used fields
-                print(f"📥 LLM call completed. Results: {len(parsed_results_list) if parsed_results_list else 0}")
+                logger.info("LLM call completed. Results: %d", len(parsed_results_list) if parsed_results_list else 0)
 
                 if parsed_results_list and parsed_results_list[0].get("parsed_data"):
                     structured_data_raw = parsed_results_list[0]["parsed_data"]
-                    print(f"✅ Got structured data from LLM: {type(structured_data_raw)}")
+                    logger.debug("Got structured data from LLM: %s", type(structured_data_raw).__name__)
                     # The 'parsed_data' from Scrape_Master is already the structured dict/Pydantic model
                     # It's often a container like {"listings": [...]}
                     if hasattr(structured_data_raw, "model_dump"): # Pydantic model
                         structured_data = structured_data_raw.model_dump()
-                        print(f"📋 Converted Pydantic model to dict")
+                        logger.debug("Converted Pydantic model to dict")
                     elif isinstance(structured_data_raw, str): # JSON string
-                        structured_data = json.loads(structured_data_raw)
-                        print(f"📋 Parsed JSON string to dict")
+                        structured_data = json_utils.loads(structured_data_raw)
+                        logger.debug("Parsed JSON string to dict")
                     else: # Already a dict
                         structured_data = structured_data_raw
-                        print(f"📋 Using dict as-is")
-                    print(f"📊 Final structured data keys: {list(structured_data.keys()) if isinstance(structured_data, dict) else 'Not a dict'}")
+                        logger.debug("Using dict as-is")
+                    logger.debug("Final structured data keys: %s", list(structured_data.keys()) if isinstance(structured_data, dict) else 'Not a dict')
                 else:
-                    print(f"❌ No valid parsed data from LLM")
+                    logger.warning("No valid parsed data from LLM")
                     structured_data = {"error": "Failed to parse structured data with Azure OpenAI."}
                     tabular_data = []
             else:
                 # Fallback: Simple data extraction from markdown without LLM
-                print("🔄 Using fallback data structuring (no Azure OpenAI)")
+                logger.info("Using fallback data structuring (no Azure OpenAI)")
                 structured_data, tabular_data = await self._extract_data_fallback(markdown_content, fields)
-                print(f"📊 Fallback extraction completed: {len(tabular_data) if tabular_data else 0} items")
+                logger.info("Fallback extraction completed: %d items", len(tabular_data) if tabular_data else 0)
 
         except Exception as e:
-            print(f"❌ Exception in LLM processing: {e}")
-            print(f"🔍 Exception type: {type(e)}")
-            import traceback
-            print(f"📋 Full traceback: {traceback.format_exc()}")
+            # Include the traceback only in debug mode, as before
+            logger.error("Exception in LLM processing (%s): %s", type(e).__name__, e, exc_info=settings.DEBUG)
 
             if use_azure_for_structuring:
-                print(f"🔄 Error structuring data with Azure OpenAI, falling back to simple extraction: {e}")
+                logger.warning("Error structuring data with Azure OpenAI, falling back to simple extraction: %s", e)
                 # Fallback to simple extraction if Azure fails
                 try:
-                    print(f"🔄 Attempting fallback extraction...")
+                    logger.info("Attempting fallback extraction...")
                     structured_data, tabular_data = await self._extract_data_fallback(markdown_content, fields)
-                    print(f"✅ Fallback extraction succeeded")
+                    logger.info("Fallback extraction succeeded")
                 except Exception as fallback_error:
-                    print(f"❌ Fallback extraction also failed: {fallback_error}")
+                    logger.error("Fallback extraction also failed: %s", fallback_error)
                     structured_data = {"error": f"Both Azure OpenAI and fallback extraction failed: {str(e)}", "raw_markdown_preview": markdown_content[:500]}
                     tabular_data = []
             else:
-                print(f"❌ Error with fallback data structuring: {e}")
+                logger.error("Error with fallback data structuring: %s", e)
                 structured_data = {"error": f"Fallback extraction failed: {str(e)}", "raw_markdown_preview": markdown_content[:500]}
                 tabular_data = []
 
@@ -551,24 +569,28 @@ class ScrapingService:
         )
 
         # Update the session with the actual structured data and formatted data
-        print(f"🔄 Updating session {created_session['id']} with processed data")
-        print(f"📊 Structured data size: {len(json.dumps(structured_data))} chars")
-        print(f"📋 Formatted data size: {len(json.dumps(formatted_data))} chars")
+        # Serialize each payload once; the same strings are logged and stored
+        structured_data_json = json_utils.dumps(structured_data)
+        formatted_data_json = json_utils.dumps(formatted_data)
+        logger.info(
+            "Updating session %s with processed data (structured: %d chars, formatted: %d chars)",
+            created_session['id'], len(structured_data_json), len(formatted_data_json)
+        )
 
         try:
             update_response = supabase.table("scrape_sessions").update({
-                "structured_data_json": json.dumps(structured_data),
-                "formatted_tabular_data": json.dumps(formatted_data),
+                "structured_data_json": structured_data_json,
+                "formatted_tabular_data": formatted_data_json,
                 "status": "scraped"  # Update status to scraped
             }).eq("id", created_session["id"]).execute()
 
             if update_response.data:
-                print(f"✅ Session updated successfully")
+                logger.info("Session updated successfully")
             else:
-                print(f"⚠️ Session update returned no data")
+                logger.warning("Session update returned no data")
 
         except Exception as e:
-            print(f"❌ Failed to update session: {e}")
+            logger.error("Failed to update session: %s", e)
             raise
 
         # Clean up environment variables if set
@@ -674,7 +696,7 @@ class ScrapingService:
         # Parse the structured_data_json field
         if "structured_data_json" in session_data and session_data["structured_data_json"]:
             try:
-                structured_data = json.loads(session_data["structured_data_json"])
+                structured_data = json_utils.parse_json_field(session_data["structured_data_json"])
                 session_data["structured_data"] = structured_data
 
                 # Extract tabular data (check both 'tabular_data' and 'listings' keys)
@@ -696,7 +718,7 @@ class ScrapingService:
         # Parse the formatted_tabular_data field
         if "formatted_tabular_data" in session_data and session_data["formatted_tabular_data"]:
             try:
-                formatted_data = json.loads(session_data["formatted_tabular_data"])
+                formatted_data = json_utils.parse_json_field(session_data["formatted_tabular_data"])
                 session_data["formatted_tabular_data"] = formatted_data
             except Exception as e:
                 print(f"Error parsing formatted_tabular_data: {e}")
@@ -722,12 +744,20 @@ class ScrapingService:
             tuple: (structured_data, tabular_data)
         """
         try:
-            import re
-
             # Initialize result structure
             tabular_data = []
 
-            print(f"Fallback extraction processing {len(markdown_content)} characters")
+            # Resolve the requested fields against the mapping table once, not per section.
+            # Check if user requested 'name', 'country', 'title', etc.; if no name-like
+            # field was requested, use 'country' as fallback
+            name_field = next((field for field in fields if field.lower() in _FALLBACK_NAME_FIELDS), 'country')
+            field_patterns = [
+                (field, next((pattern for aliases, pattern in _FALLBACK_FIELD_PATTERNS if field.lower() in aliases), None))
+                for field in fields
+                if field.lower() not in _FALLBACK_NAME_FIELDS
+            ]
+
+            logger.debug("Fallback extraction processing %d characters", len(markdown_content))
 
             # For the countries page, look for the specific pattern:
             # ### Country Name
@@ -738,7 +768,7 @@ class ScrapingService:
             # Split content by country headers (###)
             country_sections = re.split(r'\n###\s+', markdown_content)
 
-            print(f"Found {len(country_sections)} potential country sections")
+            logger.debug("Found %d potential country sections", len(country_sections))
 
             for i, section in enumerate(country_sections):
                 if i == 0:
@@ -752,54 +782,16 @@ class ScrapingService:
 
                 country_name = lines[0].strip()
 
-                # Initialize country data with user-specified field names
-                country_data = {}
-
-                # Map country name to user-requested field
-                # Check if user requested 'name', 'country', 'title', etc.
-                name_field = None
-                for field in fields:
-                    if field.lower() in ['name', 'country', 'title', 'item_name', 'product_name']:
-                        name_field = field
-                        break
-
-                # If no name-like field requested, use 'country' as fallback
-                if name_field:
-                    country_data[name_field] = country_name
-                else:
-                    country_data['country'] = country_name
-
                 # Extract capital, population, and area from the section
                 # Join all lines to handle multi-line formatting
                 section_text = ' '.join(lines[1:])
 
-                # Only extract fields that the user requested
-                for field in fields:
-                    field_lower = field.lower()
-
-                    # Skip name field as it's already handled above
-                    if field_lower in ['name', 'country', 'title', 'item_name', 'product_name']:
-                        continue
-
-                    # Map user field to website data
-                    if field_lower in ['capital', 'city']:
-                        capital_match = re.search(r'\*\*Capital:\*\*\s*([^*]+?)(?:\s*\*\*|$)', section_text)
-                        if capital_match:
-                            country_data[field] = capital_match.group(1).strip()
-
-                    elif field_lower in ['population', 'people', 'inhabitants']:
-                        population_match = re.search(r'\*\*Population:\*\*\s*([^*]+?)(?:\s*\*\*|$)', section_text)
-                        if population_match:
-                            country_data[field] = population_match.group(1).strip()
-
-                    elif field_lower in ['area', 'size', 'surface', 'land_area']:
-                        area_match = re.search(r'\*\*Area \([^)]*\):\*\*\s*([^*]+?)(?:\s*\*\*|$)', section_text)
-                        if area_match:
-                            country_data[field] = area_match.group(1).strip()
-
-                    # If field not found, add empty value to maintain structure
-                    if field not in country_data:
-                        country_data[field] = ""
+                # Only extract fields that the user requested; missing fields get an
+                # empty value to maintain structure
+                country_data = {name_field: country_name}
+                for field, pattern in field_patterns:
+                    match = pattern.search(section_text) if pattern else None
+                    country_data[field] = match.group(1).strip() if match else ""
 
                 # Only add if we have at least country name and one other field
                 if len(country_data) > 1:
@@ -813,20 +805,16 @@ class ScrapingService:
                 "requested_fields": fields
             }
 
-            print(f"Fallback extraction found {len(tabular_data)} countries")
+            logger.info("Fallback extraction found %d countries", len(tabular_data))
 
             # Show sample of extracted data
             if tabular_data:
-                print(f"Sample country: {tabular_data[0]}")
-                if len(tabular_data) > 1:
-                    print(f"Last country: {tabular_data[-1]}")
+                logger.debug("Sample country: %s; last country: %s", tabular_data[0], tabular_data[-1])
 
             return structured_data, tabular_data
 
         except Exception as e:
-            print(f"Error in fallback data extraction: {e}")
-            import traceback
-            traceback.print_exc()
+            logger.error("Error in fallback data extraction: %s", e, exc_info=settings.DEBUG)
 
             # Return minimal structure
             structured_data = {
@@ -835,6 +823,31 @@ class ScrapingService:
             }
             return structured_data, []
 
+    async def _delete_session_rows(self, session_delete, unique_scrape_identifier: Optional[str]) -> bool:
+        """
+        Delete a session's RAG data (markdowns and embeddings), then the session row.
+
+        The two RAG deletes are independent, so they are issued together. The
+        session row goes last: if a RAG delete fails, the session still
+        references its unique_name and the delete can be retried.
+
+        Args:
+            session_delete: scrape_sessions delete query, already filtered to the session
+            unique_scrape_identifier (Optional[str]): The session's RAG identifier, if any
+
+        Returns:
+            bool: True if the session row was deleted
+        """
+        if unique_scrape_identifier:
+            logger.info("Deleting RAG data for unique_scrape_identifier: %s", unique_scrape_identifier)
+            await asyncio.gather(
+                execute_async(supabase.table("embeddings").delete().eq("unique_name", unique_scrape_identifier)),
+                execute_async(supabase.table("markdowns").delete().eq("unique_name", unique_scrape_identifier))
+            )
+
+        response = await execute_async(session_delete)
+        return len(response.data) > 0
+
     async def delete_session(self, project_id: UUID, session_id: UUID) -> bool:
         """
         Delete a scraped session.
@@ -856,17 +869,11 @@ class ScrapingService:
 
             unique_scrape_identifier = session_response.data.get("unique_scrape_identifier")
 
-            if unique_scrape_identifier:
-                print(f"Deleting RAG data for unique_scrape_identifier: {unique_scrape_identifier}")
-                # Delete associated embeddings
-                supabase.table("embeddings").delete().eq("unique_name", unique_scrape_identifier).execute()
-
-                # Delete associated markdown
-                supabase.table("markdowns").delete().eq("unique_name", unique_scrape_identifier).execute()
-
             # Delete the session
-            response = supabase.table("scrape_sessions").delete().eq("id", str(session_id)).eq("project_id", str(project_id)).execute()
-            return len(response.data) > 0
+            return await self._delete_session_rows(
+                supabase.table("scrape_sessions").delete().eq("id", str(session_id)).eq("project_id", str(project_id)),
+                unique_scrape_identifier
+            )
         except Exception as e:
             print(f"Error deleting session and associated RAG data: {e}")
             return False
@@ -891,17 +898,11 @@ class ScrapingService:
 
             unique_scrape_identifier = session_response.data.get("unique_scrape_identifier")
 
-            if unique_scrape_identifier:
-                print(f"Deleting RAG data for unique_scrape_identifier: {unique_scrape_identifier}")
-                # Delete associated embeddings
-                supabase.table("embeddings").delete().eq("unique_name", unique_scrape_identifier).execute()
-
-                # Delete associated markdown
-                supabase.table("markdowns").delete().eq("unique_name", unique_scrape_identifier).execute()
-
             # Delete the session
-            response = supabase.table("scrape_sessions").delete().eq("id", str(session_id)).execute()
-            return len(response.data) > 0
+            return await self._delete_session_rows(
+                supabase.table("scrape_sessions").delete().eq("id", str(session_id)),
+                unique_scrape_identifier
+            )
         except Exception as e:
             print(f"Error deleting session and associated RAG data: {e}")
             return False
@@ -922,7 +923,8 @@ class ScrapingService:
             HTTPException: If session not found
         """
         # Get session data
-        session_response = supabase.table("scrape_sessions").select("*").eq("id", str(session_id)).eq("project_id", str(project_id)).single().execute()
+        # Only the columns used below; raw_markdown can be very large
+        session_response = supabase.table("scrape_sessions").select("url, display_format, structured_data_json").eq("id", str(session_id)).eq("project_id", str(project_id)).single().execute()
         if not session_response.data:
             raise HTTPException(status_code=404, detail="Session not found")
 
@@ -947,8 +949,17 @@ class ScrapingService:
         except Exception as e:
             print(f"Error getting display format: {e}")
 
-        # Parse structured data
-        structured_data = json.loads(session.get("structured_data_json", "{}"))
+        # The stored JSON is already the table download, so return it without parsing
+        raw_structured_data = session.get("structured_data_json") or "{}"
+        if format == "json" and display_format == "table" and isinstance(raw_structured_data, str):
+            return Response(
+                content=raw_structured_data,
+                media_type="application/json",
+                headers={"Content-Disposition": f"attachment; filename=scraped_data_{session_id}.json"}
+            )
+
+        # Parse structured data once; everything below works on the parsed dict
+        structured_data = json_utils.parse_json_field(raw_structured_data)
         # Check both 'tabular_data' and 'listings' keys for compatibility
         tabular_data = structured_data.get("tabular_data", [])
         if not tabular_data and "listings" in structured_data:
@@ -965,11 +976,11 @@ class ScrapingService:
             if display_format != "table" and tabular_data:
                 formatted_data = await format_data_for_display(tabular_data, fields, display_format)
                 if display_format == "paragraph":
-                    content = json.dumps({"paragraph_data": formatted_data["paragraph_data"]})
+                    content = json_utils.dumps({"paragraph_data": formatted_data["paragraph_data"]})
                 elif display_format == "raw":
-                    content = json.dumps({"raw_data": formatted_data["raw_data"]})
+                    content = json_utils.dumps({"raw_data": formatted_data["raw_data"]})
                 else:
-                    content = json.dumps({"tabular_data": tabular_data})
+                    content = json_utils.dumps({"tabular_data": tabular_data})
             else:
                 content = session.get("structured_data_json", "{}")
 
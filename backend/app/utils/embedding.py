@@ -3,12 +3,163 @@ Utility functions for embedding generation using Azure OpenAI Service.
 """
 import numpy as np
 from typing import List, Optional, Dict, Any
-import httpx
 import asyncio
-from math import ceil
+import logging
+from collections import OrderedDict
+from functools import lru_cache
+from hashlib import blake2b
+
+import httpx
+import tiktoken
 
 from ..scraper_modules.assets import AZURE_EMBEDDING_MODEL # Corrected path
 from ..config import settings
+from . import json_utils
+from .http_client import get_http_client
+
+logger = logging.getLogger(__name__)
+
+# Azure OpenAI text-embedding-ada-002 has 1536 dimensions (matches VECTOR(1536))
+EMBEDDING_DIMENSIONS = 1536
+
+# pgvector literal template for a full-width embedding, e.g. "[%.9g,%.9g,...]"
+_PGVECTOR_TEMPLATE = "[" + ",".join(["%.9g"] * EMBEDDING_DIMENSIONS) + "]"
+
+# Set once the first real API response has been checked against EMBEDDING_DIMENSIONS
+_dimension_checked = False
+
+# Retries for rate-limited (429) embedding requests before giving up on a batch
+EMBEDDING_MAX_RETRIES = 3
+
+# Recently embedded chunks keyed by content hash, stored as float32 (~6 KB each).
+# Scraped pages repeat a lot of boilerplate (navigation, footers), so identical
+# chunks across sessions skip the Azure call entirely.
+EMBEDDING_CACHE_SIZE = 2048
+_embedding_cache: "OrderedDict[bytes, np.ndarray]" = OrderedDict()
+
+def _content_key(text: str) -> bytes:
+    """
+    Hash chunk text into a compact cache key.
+    """
+    return blake2b(text.encode("utf-8"), digest_size=16).digest()
+
+def _cache_embeddings(texts: List[str], embeddings: List[List[float]]) -> None:
+    """
+    Remember embeddings returned by the API (never the random fallbacks).
+    """
+    if len(texts) != len(embeddings):
+        return
+    for text, embedding in zip(texts, embeddings):
+        key = _content_key(text)
+        _embedding_cache[key] = np.asarray(embedding, dtype=np.float32)
+        _embedding_cache.move_to_end(key)
+    while len(_embedding_cache) > EMBEDDING_CACHE_SIZE:
+        _embedding_cache.popitem(last=False)
+
+def _cached_embedding(key: bytes) -> Optional[List[float]]:
+    """
+    Look up an embedding by content hash, refreshing its LRU position on a hit.
+    """
+    cached = _embedding_cache.get(key)
+    if cached is None:
+        return None
+    _embedding_cache.move_to_end(key)
+    return cached.tolist()
+
+@lru_cache(maxsize=1)
+def _get_encoding():
+    """
+    Load the tokenizer used by text-embedding-ada-002 once per process.
+
+    Returns None if it cannot be loaded (e.g. no network to fetch its BPE
+    file). lru_cache does not cache exceptions, so the failure is returned
+    rather than raised; otherwise every chunk would retry the download.
+    """
+    try:
+        return tiktoken.get_encoding("cl100k_base")
+    except Exception as e:
+        logger.warning("tiktoken encoding unavailable, estimating tokens from length: %s", e)
+        return None
+
+def _count_tokens(text: str) -> int:
+    """
+    Count tokens in text, falling back to the 4-characters-per-token estimate
+    if the tokenizer could not be loaded.
+    """
+    encoding = _get_encoding()
+    if encoding is None:
+        return len(text) // 4 + 1
+    return len(encoding.encode(text))
+
+def _token_batches(texts: List[str], max_items: int, max_tokens: int) -> List[List[str]]:
+    """
+    Group texts into consecutive batches bounded by item count and token budget.
+
+    A single text larger than the budget still gets a batch of its own.
+
+    Args:
+        texts (List[str]): Texts to group, in order
+        max_items (int): Maximum texts per batch
+        max_tokens (int): Maximum total tokens per batch
+
+    Returns:
+        List[List[str]]: Batches whose concatenation equals texts
+    """
+    batches = []
+    current: List[str] = []
+    current_tokens = 0
+    for text in texts:
+        tokens = _count_tokens(text)
+        if current and (len(current) >= max_items or current_tokens + tokens > max_tokens):
+            batches.append(current)
+            current, current_tokens = [], 0
+        current.append(text)
+        current_tokens += tokens
+    if current:
+        batches.append(current)
+    return batches
+
+def retry_delay(response: httpx.Response, attempt: int) -> float:
+    """
+    Seconds to wait before retrying a rate-limited request: the server's
+    Retry-After when given, otherwise exponential backoff.
+    """
+    try:
+        return float(response.headers["retry-after"])
+    except (KeyError, ValueError):
+        return 2.0 ** attempt
+
+def _check_dimension_once(embeddings: List[List[float]]) -> None:
+    """
+    Verify the embedding width on the first successful API response only.
+
+    The deployment does not change mid-run, so later batches skip the check.
+
+    Args:
+        embeddings (List[List[float]]): Embeddings returned by the API
+    """
+    global _dimension_checked
+    if _dimension_checked or not embeddings:
+        return
+    _dimension_checked = True
+    if len(embeddings[0]) != EMBEDDING_DIMENSIONS:
+        logger.warning("Embedding deployment returned %d dimensions, expected %d", len(embeddings[0]), EMBEDDING_DIMENSIONS)
+
+def _random_embeddings(count: int) -> List[List[float]]:
+    """
+    Build random development fallback embeddings.
+
+    Draws one float32 matrix for the whole batch and converts it to plain
+    Python floats once, instead of a list of 1536 boxed numpy.float64 scalars
+    per text.
+
+    Args:
+        count (int): Number of embeddings to generate
+
+    Returns:
+        List[List[float]]: Random embedding vectors
+    """
+    return np.random.rand(count, EMBEDDING_DIMENSIONS).astype(np.float32).tolist()
 
 async def generate_embeddings(text: str, azure_credentials: Optional[Dict[str, str]] = None) -> List[float]:
     """
@@ -29,7 +180,7 @@ async def generate_embeddings(text: str, azure_credentials: Optional[Dict[str, s
         # Consider raising a ValueError or logging an error here
         # Return a random embedding for development purposes
         # In production, this should raise an exception
-        return list(np.random.rand(1536))  # Azure OpenAI text-embedding-ada-002 has 1536 dimensions
+        return _random_embeddings(1)[0]
 
     api_key = azure_credentials['api_key']
     endpoint = azure_credentials['endpoint']
@@ -47,7 +198,8 @@ async def generate_embeddings(text: str, azure_credentials: Optional[Dict[str, s
             # Traditional Azure OpenAI format
             url = f"{endpoint}/openai/deployments/{deployment_name}/embeddings?api-version=2023-05-15"
 
-        print(f"Using embedding API URL: {url}")
+        # Emitted for every query embedding, so only at debug level
+        logger.debug("Using embedding API URL: %s", url)
 
         # Request payload
         payload = {
@@ -55,30 +207,32 @@ async def generate_embeddings(text: str, azure_credentials: Optional[Dict[str, s
         }
 
         # Make the API request
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                url,
-                json=payload,
-                headers={
-                    "Content-Type": "application/json",
-                    "api-key": api_key
-                }
-            )
-
-            if response.status_code != 200:
-                print(f"Error from Azure API: {response.status_code} - {response.text}")
-                # Return random embedding as fallback for development
-                return list(np.random.rand(1536))
-
-            # Extract embedding from response
-            response_data = response.json()
-            embedding = response_data.get("data", [{}])[0].get("embedding", [])
-
-            return embedding
+        client = get_http_client()
+        response = await client.post(
+            url,
+            json=payload,
+            headers={
+                "Content-Type": "application/json",
+                "api-key": api_key
+            }
+        )
+
+        if response.status_code != 200:
+            logger.error("Error from Azure API: %s - %s", response.status_code, response.text)
+            # Return random embedding as fallback for development
+            return _random_embeddings(1)[0]
+
+        # Extract embedding from response; orjson parses the raw bytes directly,
+        # which matters for 1536-float vectors
+        response_data = json_utils.loads(response.content)
+        embedding = response_data.get("data", [{}])[0].get("embedding", [])
+        _check_dimension_once([embedding])
+
+        return embedding
     except Exception as e:
         # Log the error
         # Return a random embedding as fallback for development
-        return list(np.random.rand(1536))
+        return _random_embeddings(1)[0]
 
 async def generate_embeddings_batch(texts: List[str], azure_credentials: Optional[Dict[str, str]] = None) -> List[List[float]]:
     """
@@ -99,9 +253,9 @@ async def generate_embeddings_batch(texts: List[str], azure_credentials: Optiona
 
     if not azure_credentials or 'api_key' not in azure_credentials or 'endpoint' not in azure_credentials:
         # In a production environment, we should log this properly
-        print("Error: Azure OpenAI credentials missing or incomplete")
+        logger.error("Azure OpenAI credentials missing or incomplete")
         # Return random embeddings for development purposes
-        return [list(np.random.rand(1536)) for _ in texts]
+        return _random_embeddings(len(texts))
 
     api_key = azure_credentials['api_key']
     endpoint = azure_credentials['endpoint']
@@ -121,8 +275,9 @@ async def generate_embeddings_batch(texts: List[str], azure_credentials: Optiona
             "input": texts
         }
 
-        # Make the API request
-        async with httpx.AsyncClient() as client:
+        # Make the API request, backing off when Azure reports rate limiting
+        client = get_http_client()
+        for attempt in range(EMBEDDING_MAX_RETRIES + 1):
             response = await client.post(
                 url,
                 json=payload,
@@ -131,56 +286,111 @@ async def generate_embeddings_batch(texts: List[str], azure_credentials: Optiona
                     "api-key": api_key
                 }
             )
-
-            if response.status_code != 200:
-                print(f"Error from Azure API in batch embedding: {response.status_code} - {response.text}")
-                # Return random embeddings as fallback for development
-                return [list(np.random.rand(1536)) for _ in texts]
-
-            # Extract embeddings from response
-            response_data = response.json()
-            embeddings = [item.get("embedding", []) for item in response_data.get("data", [])]
-
-            return embeddings
+            if response.status_code != 429 or attempt == EMBEDDING_MAX_RETRIES:
+                break
+            await asyncio.sleep(retry_delay(response, attempt))
+
+        if response.status_code != 200:
+            logger.error("Error from Azure API in batch embedding: %s - %s", response.status_code, response.text)
+            # Return random embeddings as fallback for development
+            return _random_embeddings(len(texts))
+
+        # Extract embeddings from response (raw bytes straight to orjson)
+        response_data = json_utils.loads(response.content)
+        # Items carry their input index; don't rely on response order
+        data = sorted(response_data.get("data", []), key=lambda item: item.get("index", 0))
+        embeddings = [item.get("embedding", []) for item in data]
+        _check_dimension_once(embeddings)
+        _cache_embeddings(texts, embeddings)
+
+        return embeddings
     except Exception as e:
         # Log the error
         # Consider logging an error here
         # Return random embeddings as fallback for development
-        return [list(np.random.rand(1536)) for _ in texts]
+        return _random_embeddings(len(texts))
 
 async def process_chunks_with_batching(chunks: List[str], azure_credentials: Dict[str, str]) -> List[List[float]]:
     """
     Process text chunks with batching for efficient embedding generation.
 
+    Chunks already embedded recently (or repeated within this call) are served
+    from the content-hash cache; only the rest are sent to the API. Those are
+    packed into requests bounded by both EMBEDDING_BATCH_SIZE and
+    EMBEDDING_MAX_TOKENS_PER_REQUEST, and up to EMBEDDING_MAX_CONCURRENCY
+    requests run at once. Rate limiting is handled by backoff in
+    generate_embeddings_batch rather than a fixed pause between batches.
+
     Args:
         chunks (List[str]): List of text chunks to process
         azure_credentials (Dict[str, str]): Azure OpenAI credentials
 
     Returns:
-        List[List[float]]: List of embedding vectors
+        List[List[float]]: List of embedding vectors, in chunk order
     """
-    batch_size = settings.EMBEDDING_BATCH_SIZE
-    num_chunks = len(chunks)
-    num_batches = ceil(num_chunks / batch_size)
-    all_embeddings = []
+    keys = [_content_key(chunk) for chunk in chunks]
+    embeddings_by_key: Dict[bytes, List[float]] = {}
+    missing_keys: List[bytes] = []
+    missing_chunks: List[str] = []
+    pending = set()
+    for key, chunk in zip(keys, chunks):
+        if key in embeddings_by_key or key in pending:
+            continue
+        cached = _cached_embedding(key)
+        if cached is not None:
+            embeddings_by_key[key] = cached
+        else:
+            pending.add(key)
+            missing_keys.append(key)
+            missing_chunks.append(chunk)
+
+    batches = _token_batches(missing_chunks, settings.EMBEDDING_BATCH_SIZE, settings.EMBEDDING_MAX_TOKENS_PER_REQUEST)
+    semaphore = asyncio.Semaphore(settings.EMBEDDING_MAX_CONCURRENCY)
 
     # Consider logging this information
-    # logger.info(f"Processing {num_chunks} chunks in {num_batches} batches (batch size: {batch_size})")
+    # logger.info(f"Processing {len(missing_chunks)} of {len(chunks)} chunks in {len(batches)} batches")
 
-    for i in range(num_batches):
-        start_idx = i * batch_size
-        end_idx = min((i + 1) * batch_size, num_chunks)
-        batch_chunks = chunks[start_idx:end_idx]
+    async def embed_batch(batch: List[str]) -> List[List[float]]:
+        async with semaphore:
+            return await generate_embeddings_batch(batch, azure_credentials)
 
-        # Process this batch
-        batch_embeddings = await generate_embeddings_batch(batch_chunks, azure_credentials)
-        all_embeddings.extend(batch_embeddings)
+    # Batches are consecutive slices of missing_chunks; slice the keys the same way
+    batch_keys = []
+    offset = 0
+    for batch in batches:
+        batch_keys.append(missing_keys[offset:offset + len(batch)])
+        offset += len(batch)
 
-        # Small delay to avoid rate limiting
-        if i < num_batches - 1:
-            await asyncio.sleep(0.5)
+    # Pair each batch's keys with that batch's own results, so a short response
+    # only leaves the tail of its own batch unfilled
+    results = await asyncio.gather(*(embed_batch(batch) for batch in batches))
+    for keys_for_batch, batch_embeddings in zip(batch_keys, results):
+        embeddings_by_key.update(zip(keys_for_batch, batch_embeddings))
 
-    return all_embeddings
+    # A short API response leaves some keys unfilled; use the development fallback for those
+    return [embeddings_by_key.get(key) or _random_embeddings(1)[0] for key in keys]
+
+def to_pgvector_literal(embedding: List[float]) -> str:
+    """
+    Format an embedding as a pgvector text literal (e.g. "[0.1,0.2,...]").
+
+    PostgREST parses the literal straight into the VECTOR column. Nine
+    significant digits are enough for every value to round-trip exactly
+    through the column's FP32 storage, and the body is still smaller than
+    the default 17-digit repr(float) JSON list.
+
+    Full-width embeddings are formatted in one %-operation against a template
+    built at import, instead of one f-string per value.
+
+    Args:
+        embedding (List[float]): Embedding values
+
+    Returns:
+        str: pgvector literal string
+    """
+    if len(embedding) == EMBEDDING_DIMENSIONS:
+        return _PGVECTOR_TEMPLATE % tuple(embedding)
+    return "[" + ",".join(f"{v:.9g}" for v in embedding) + "]"
 
 def calculate_embedding_cost(text: str) -> float:
     """
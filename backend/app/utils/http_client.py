@@ -0,0 +1,48 @@
+"""
+Shared HTTP client for outbound API calls (Azure OpenAI and friends).
+"""
+from typing import Optional
+
+import httpx
+
+try:
+    import h2  # noqa: F401  (enables HTTP/2 in httpx)
+    _HTTP2_AVAILABLE = True
+except ImportError:  # pragma: no cover - h2 comes with httpx[http2] in requirements.txt
+    _HTTP2_AVAILABLE = False
+
+# Fail fast on unreachable hosts, but give embedding/chat completions time to respond
+DEFAULT_TIMEOUT = httpx.Timeout(60.0, connect=5.0)
+DEFAULT_LIMITS = httpx.Limits(max_connections=100, max_keepalive_connections=20)
+
+_client: Optional[httpx.AsyncClient] = None
+
+def get_http_client() -> httpx.AsyncClient:
+    """
+    Return the process-wide AsyncClient, creating it on first use.
+
+    Reusing one client keeps its connection pool alive, so repeated calls to
+    the same endpoint skip the TCP/TLS handshake that a per-call
+    `async with httpx.AsyncClient()` pays every time. With HTTP/2, concurrent
+    requests to the same Azure endpoint are multiplexed over one connection.
+
+    Returns:
+        httpx.AsyncClient: Shared client
+    """
+    global _client
+    if _client is None or _client.is_closed:
+        _client = httpx.AsyncClient(
+            timeout=DEFAULT_TIMEOUT,
+            limits=DEFAULT_LIMITS,
+            http2=_HTTP2_AVAILABLE
+        )
+    return _client
+
+async def close_http_client() -> None:
+    """
+    Close the shared client and release its pooled connections.
+    """
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
@@ -0,0 +1,63 @@
+"""
+Fast JSON helpers for large scraped-data payloads.
+"""
+from typing import Any, Union
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson is listed in requirements.txt
+    orjson = None
+    import json
+
+
+def dumps(obj: Any) -> str:
+    """
+    Serialize an object to a compact JSON string.
+
+    Uses orjson when available, which is several times faster than the
+    stdlib encoder on the thousands-of-listings payloads stored in
+    structured_data_json. PostgREST expects text, so the bytes are decoded.
+
+    Args:
+        obj (Any): Object to serialize
+
+    Returns:
+        str: JSON string
+    """
+    if orjson is not None:
+        return orjson.dumps(obj).decode()
+    return json.dumps(obj, separators=(",", ":"))
+
+
+def loads(data: Union[str, bytes]) -> Any:
+    """
+    Parse a JSON string or bytes.
+
+    Args:
+        data (Union[str, bytes]): JSON document
+
+    Returns:
+        Any: Parsed object
+    """
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def parse_json_field(value: Any) -> Any:
+    """
+    Parse a column value that may be stored as a JSON string or already decoded.
+
+    structured_data_json and formatted_tabular_data are written as JSON
+    strings, but a JSONB column can also come back already parsed, so
+    callers should not branch on the type themselves.
+
+    Args:
+        value (Any): Raw column value
+
+    Returns:
+        Any: Parsed object, or the value unchanged if it is not a string
+    """
+    if isinstance(value, (str, bytes, bytearray)):
+        return loads(value)
+    return value
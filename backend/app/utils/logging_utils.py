@@ -1,15 +1,18 @@
 """
 Utility functions for structured logging.
 """
+import atexit
 import logging
-import json
 import os
+import queue
 import sys
 import uuid
 from datetime import datetime, timezone
-from logging.handlers import RotatingFileHandler
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
 from typing import Dict, Any, Optional
 
+from . import json_utils
+
 # Create logs directory if it doesn't exist
 os.makedirs("logs", exist_ok=True)
 
@@ -22,7 +25,6 @@ console_handler = logging.StreamHandler(sys.stdout)
 console_handler.setLevel(logging.INFO)
 console_formatter = logging.Formatter('[%(asctime)s] %(levelname)s [%(name)s] %(message)s')
 console_handler.setFormatter(console_formatter)
-root_logger.addHandler(console_handler)
 
 # File handler with rotation
 file_handler = RotatingFileHandler(
@@ -33,7 +35,19 @@ file_handler = RotatingFileHandler(
 file_handler.setLevel(logging.INFO)
 file_formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 file_handler.setFormatter(file_formatter)
-root_logger.addHandler(file_handler)
+
+# Request handlers only enqueue records; a background thread does the stdout and
+# file writes, so a blocked pipe or slow disk never stalls the event loop
+log_queue = queue.SimpleQueue()
+root_logger.addHandler(QueueHandler(log_queue))
+log_listener = QueueListener(log_queue, console_handler, file_handler, respect_handler_level=True)
+log_listener.start()
+atexit.register(log_listener.stop)
+
+# HTTP client libraries log every PostgREST and Azure request at INFO; keep
+# per-request lines out of the app log so each DB call doesn't cost log I/O
+for noisy_logger in ("httpx", "httpcore", "hpack"):
+    logging.getLogger(noisy_logger).setLevel(logging.WARNING)
 
 # Create a separate logger for Firecrawl API
 firecrawl_logger = logging.getLogger("firecrawl_api")
@@ -105,7 +119,7 @@ def log_firecrawl_request(
         "type": "request",
         "url": url,
         "method": method,
-        "payload_size": len(json.dumps(payload))
+        "payload_size": len(json_utils.dumps(payload))
     }
     
     # Don't log the actual API key
@@ -116,7 +130,7 @@ def log_firecrawl_request(
     if additional_info:
         log_data.update(additional_info)
     
-    firecrawl_logger.info(json.dumps(log_data))
+    firecrawl_logger.info(json_utils.dumps(log_data))
 
 def log_firecrawl_response(
     correlation_id: str,
@@ -154,7 +168,7 @@ def log_firecrawl_response(
     if additional_info:
         log_data.update(additional_info)
     
-    firecrawl_logger.info(json.dumps(log_data))
+    firecrawl_logger.info(json_utils.dumps(log_data))
 
 def log_firecrawl_error(
     correlation_id: str,
@@ -186,4 +200,4 @@ def log_firecrawl_error(
     if additional_info:
         log_data.update(additional_info)
     
-    firecrawl_logger.error(json.dumps(log_data))
+    firecrawl_logger.error(json_utils.dumps(log_data))
@@ -4,15 +4,34 @@ Utility functions for system resource checking.
 import os
 import psutil
 import platform
-from typing import Dict, Any
+import time
+from typing import Dict, Any, Optional, Tuple
+
+# How long a resource snapshot is reused; sampling CPU load blocks for half a second
+RESOURCE_CHECK_TTL_SECONDS = 5.0
+
+_last_check: Optional[Tuple[float, Dict[str, Any]]] = None
+
+# Facts that can't change while the process runs, looked up once at import
+_SYSTEM = platform.system()
+_RELEASE = platform.release()
+# Running in a container with limited resources?
+_IN_CONTAINER = os.path.exists('/.dockerenv')
 
 def check_system_resources() -> Dict[str, Any]:
     """
     Check if the system has enough resources to run browser automation.
+
+    A successful check is reused for RESOURCE_CHECK_TTL_SECONDS, so repeated
+    diagnostics calls don't each pay the CPU sampling interval.
     
     Returns:
         Dict[str, Any]: Dictionary with system resource information and status
     """
+    global _last_check
+    if _last_check is not None and time.monotonic() - _last_check[0] < RESOURCE_CHECK_TTL_SECONDS:
+        return _last_check[1]
+
     try:
         # Get system memory info
         memory = psutil.virtual_memory()
@@ -25,21 +44,18 @@ def check_system_resources() -> Dict[str, Any]:
         disk = psutil.disk_usage('/')
         free_disk_gb = round(disk.free / (1024 * 1024 * 1024), 2)
         
-        # Check if we're running in a container with limited resources
-        in_container = os.path.exists('/.dockerenv')
-        
         # Determine if resources are sufficient
         has_sufficient_memory = available_memory_gb >= 1.0  # At least 1GB free
         has_sufficient_cpu = cpu_percent < 90             # CPU not completely overloaded
         has_sufficient_disk = free_disk_gb >= 1.0         # At least 1GB free disk
         
-        return {
-            "system": platform.system(),
-            "release": platform.release(),
+        resources = {
+            "system": _SYSTEM,
+            "release": _RELEASE,
             "available_memory_gb": available_memory_gb,
             "cpu_percent": cpu_percent,
             "free_disk_gb": free_disk_gb,
-            "in_container": in_container,
+            "in_container": _IN_CONTAINER,
             "has_sufficient_resources": has_sufficient_memory and has_sufficient_cpu and has_sufficient_disk,
             "resource_issues": {
                 "memory": not has_sufficient_memory,
@@ -47,6 +63,9 @@ def check_system_resources() -> Dict[str, Any]:
                 "disk": not has_sufficient_disk
             }
         }
+        # Only successful checks are cached so a transient error isn't repeated
+        _last_check = (time.monotonic(), resources)
+        return resources
     except Exception as e:
         # If we can't check resources, assume they're sufficient but log the error
         # Consider logging this error using the application's logger
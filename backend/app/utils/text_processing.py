@@ -3,12 +3,42 @@ Utility functions for text processing.
 """
 import re
 import json
-import httpx
-from typing import List, Dict, Any, Optional
+from .http_client import get_http_client
+from typing import Iterable, List, Dict, Any, Optional
 import tiktoken
 
 from ..scraper_modules.assets import AZURE_CHAT_MODEL # Changed to relative import
 
+def keyword_regex(keywords: Iterable[str]) -> "re.Pattern[str]":
+    """
+    Compile keywords into one alternation that matches if any of them occurs as a substring.
+
+    Checking a query against the pattern is a single C-level scan instead of
+    one `in` walk per keyword.
+
+    Args:
+        keywords (Iterable[str]): Literal keywords (escaped before compiling)
+
+    Returns:
+        re.Pattern[str]: Compiled pattern; use .search() on the lowercased query
+    """
+    return re.compile("|".join(map(re.escape, keywords)))
+
+def completion_text(response_data: Dict[str, Any]) -> str:
+    """
+    Return the first choice's message content from a chat completions response.
+
+    Args:
+        response_data (Dict[str, Any]): Parsed chat completions response body
+
+    Returns:
+        str: Message content, or "" if the response has no choices or content
+    """
+    choices = response_data.get("choices")
+    if not choices:
+        return ""
+    return (choices[0].get("message") or {}).get("content") or ""
+
 async def structure_scraped_data(
     markdown_content: str,
     conditions: str = None,
@@ -32,23 +62,26 @@ async def structure_scraped_data(
     title_match = re.search(r'# (.*?)(\n|$)', markdown_content)
     title = title_match.group(1) if title_match else "Untitled"
 
-    # Extract sections
+    # Extract sections; each section's lines are collected and joined once, since
+    # += on a dict value copies the whole growing string for every line
     sections = []
-    current_section = None
+    current_heading = None
+    current_lines = []
 
     for line in markdown_content.split('\n'):
         if line.startswith('## '):
-            if current_section:
-                sections.append(current_section)
-            current_section = {"heading": line[3:], "content": ""}
+            if current_heading is not None:
+                sections.append({"heading": current_heading, "content": "".join(current_lines)})
+            current_heading = line[3:]
+            current_lines = []
         elif line.startswith('# '):
             # Skip h1 (title)
             continue
-        elif current_section:
-            current_section["content"] += line + "\n"
+        elif current_heading is not None:
+            current_lines.append(line + "\n")
 
-    if current_section:
-        sections.append(current_section)
+    if current_heading is not None:
+        sections.append({"heading": current_heading, "content": "".join(current_lines)})
 
     # Extract bullet points
     bullet_points = re.findall(r'- (.*?)(\n|$)', markdown_content)
@@ -152,21 +185,30 @@ async def format_data_for_display(
     raw_data = ""
 
     if tabular_data:
+        # Collect lines and join once; repeated += on a growing string is quadratic
         # Format data for paragraph view
+        paragraph_lines = []
         for i, row in enumerate(tabular_data):
-            paragraph_data += f"Item {i+1}:\n"
-            for field_name in fields: # Iterate using fields to maintain order and selection
-                if field_name in row and row[field_name]:
-                    paragraph_data += f"{field_name.capitalize()}: {row[field_name]}\n"
-            paragraph_data += "\n"
+            paragraph_lines.append(f"Item {i+1}:")
+            paragraph_lines.extend(
+                f"{field_name.capitalize()}: {row[field_name]}"
+                for field_name in fields # Iterate using fields to maintain order and selection
+                if field_name in row and row[field_name]
+            )
+            paragraph_lines.append("")
+        paragraph_data = "".join(f"{line}\n" for line in paragraph_lines)
 
         # Format data for raw view (structured items)
+        raw_lines = []
         for i, row in enumerate(tabular_data):
-            raw_data += f"--- Item {i+1} ---\n"
-            for field_name, value in row.items(): # Show all extracted fields for each item in raw
-                if value:
-                    raw_data += f"{field_name}: {value}\n"
-            raw_data += "\n"
+            raw_lines.append(f"--- Item {i+1} ---")
+            raw_lines.extend(
+                f"{field_name}: {value}"
+                for field_name, value in row.items() # Show all extracted fields for each item in raw
+                if value
+            )
+            raw_lines.append("")
+        raw_data = "".join(f"{line}\n" for line in raw_lines)
     else:
         # No tabular data extracted
         paragraph_data = "No structured items were extracted from the content."
@@ -271,7 +313,7 @@ async def extract_data_with_regex(
         
         if requested_content_field and not combined_data.get(requested_content_field): # Check if not already found
             # Try to get a summary from the main content, avoiding just the title
-            content_paragraphs = [p.strip() for p in markdown_content.split('\n\n') if p.strip()]
+            content_paragraphs = [p for p in map(str.strip, markdown_content.split('\n\n')) if p] # strip each paragraph once
             if content_paragraphs:
                 # Find first non-title paragraph if possible
                 first_content_paragraph = ""
@@ -390,55 +432,55 @@ async def extract_structured_data_with_llm(
 
     try:
         # Make the API request
-        async with httpx.AsyncClient(timeout=60.0) as client:
-            response = await client.post(
-                url,
-                json=payload,
-                headers={
-                    "Content-Type": "application/json",
-                    "api-key": api_key
-                }
-            )
-
-            if response.status_code != 200:
-                # Consider logging this error
-                return []
-
-            # Extract the response content
-            response_data = response.json()
-            content = response_data.get("choices", [{}])[0].get("message", {}).get("content", "")
-
-            # Parse the JSON response
-            try:
-                # Find JSON array in the response (in case there's any extra text)
-                json_start = content.find("[")
-                json_end = content.rfind("]") + 1
-
-                if json_start >= 0 and json_end > json_start:
-                    json_content = content[json_start:json_end]
-                    tabular_data = json.loads(json_content)
-
-                    # Ensure the result is a list of dictionaries
-                    if isinstance(tabular_data, list):
-                        # Normalize field names to lowercase for consistency
-                        normalized_data = []
-                        for row in tabular_data:
-                            if isinstance(row, dict):
-                                normalized_row = {}
-                                for key, value in row.items():
-                                    normalized_row[key.lower()] = value
-                                normalized_data.append(normalized_row)
-
-                        return normalized_data
-                    else:
-                        # Consider logging this error
-                        return []
+        client = get_http_client()
+        response = await client.post(
+            url,
+            json=payload,
+            headers={
+                "Content-Type": "application/json",
+                "api-key": api_key
+            }
+        )
+
+        if response.status_code != 200:
+            # Consider logging this error
+            return []
+
+        # Extract the response content
+        response_data = response.json()
+        content = completion_text(response_data)
+
+        # Parse the JSON response
+        try:
+            # Find JSON array in the response (in case there's any extra text)
+            json_start = content.find("[")
+            json_end = content.rfind("]") + 1
+
+            if json_start >= 0 and json_end > json_start:
+                json_content = content[json_start:json_end]
+                tabular_data = json.loads(json_content)
+
+                # Ensure the result is a list of dictionaries
+                if isinstance(tabular_data, list):
+                    # Normalize field names to lowercase for consistency
+                    normalized_data = []
+                    for row in tabular_data:
+                        if isinstance(row, dict):
+                            normalized_row = {}
+                            for key, value in row.items():
+                                normalized_row[key.lower()] = value
+                            normalized_data.append(normalized_row)
+
+                    return normalized_data
                 else:
                     # Consider logging this error
                     return []
-            except json.JSONDecodeError as e:
-                # Consider logging this error and the content
+            else:
+                # Consider logging this error
                 return []
+        except json.JSONDecodeError as e:
+            # Consider logging this error and the content
+            return []
     except Exception as e:
         # Consider logging this error
         return []
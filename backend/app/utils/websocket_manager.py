@@ -1,6 +1,7 @@
 """
 WebSocket connection manager for real-time updates.
 """
+import asyncio
 from typing import Dict, List, Any
 from fastapi import WebSocket
 
@@ -79,12 +80,16 @@ class ConnectionManager:
                 "data": progress_data
             }
             
-            for connection in self.active_connections[project_id]:
-                try:
-                    await connection.send_json(message)
-                except Exception:
-                    # Connection might be closed, we'll handle it on the next ping
-                    pass
+            # Send to every client at once so one slow socket doesn't hold up the rest
+            connections = list(self.active_connections[project_id])
+            results = await asyncio.gather(
+                *(connection.send_json(message) for connection in connections),
+                return_exceptions=True
+            )
+            for connection, result in zip(connections, results):
+                if isinstance(result, Exception):
+                    # Connection is closed; stop pushing to it
+                    self.disconnect(connection, project_id)
 
     def clear_progress(self, project_id: str, session_id: str):
         """
@@ -0,0 +1,10 @@
+-- Migration: Add indexes for the hot scrape_sessions lookups
+-- scrape_sessions is always filtered by project_id (optionally with status or url),
+-- but the foreign key alone does not create an index, so every lookup was a
+-- sequential scan over all sessions.
+
+-- Sessions for a project, optionally narrowed to a status ('scraped', 'rag_ingested')
+CREATE INDEX IF NOT EXISTS scrape_sessions_project_id_status_idx ON scrape_sessions(project_id, status);
+
+-- Sessions for a specific URL within a project
+CREATE INDEX IF NOT EXISTS scrape_sessions_project_id_url_idx ON scrape_sessions(project_id, url);
@@ -0,0 +1,34 @@
+-- Add SQL function returning per-session RAG status for a project in one round trip
+-- (replaces one embeddings count request per session in the rag-status endpoint)
+CREATE OR REPLACE FUNCTION get_session_rag_status(
+    p_project_id UUID
+)
+RETURNS TABLE (
+    session_id UUID,
+    url TEXT,
+    status TEXT,
+    scraped_at TIMESTAMPTZ,
+    has_structured_data BOOLEAN,
+    embedding_count BIGINT
+) AS $$
+BEGIN
+    RETURN QUERY
+    SELECT
+        s.id,
+        s.url,
+        s.status,
+        s.scraped_at,
+        -- Only report whether structured data exists; the JSON itself can be large
+        (s.structured_data_json IS NOT NULL AND s.structured_data_json <> '{}'::jsonb),
+        emb.embedding_count
+    FROM scrape_sessions s
+    -- Counted per session through the (unique_name, chunk_id) unique index
+    LEFT JOIN LATERAL (
+        SELECT COUNT(*) AS embedding_count
+        FROM embeddings e
+        WHERE e.unique_name = s.unique_scrape_identifier
+    ) emb ON TRUE
+    WHERE s.project_id = p_project_id
+    ORDER BY s.scraped_at;
+END;
+$$ LANGUAGE plpgsql;
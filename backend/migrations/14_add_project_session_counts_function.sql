@@ -0,0 +1,17 @@
+-- Add SQL function returning scrape session counts for several projects in one round trip
+-- (replaces one count request per project when listing projects)
+-- Returns a single JSONB object {project_id: count} rather than a row per project,
+-- so PostgREST's max-rows cap cannot truncate the result for large project lists
+CREATE OR REPLACE FUNCTION get_project_session_counts(
+    p_project_ids UUID[]
+)
+RETURNS JSONB AS $$
+    SELECT COALESCE(jsonb_object_agg(counts.project_id, counts.session_count), '{}'::jsonb)
+    FROM (
+        -- Grouped through scrape_sessions_project_id_status_idx (migration 12)
+        SELECT s.project_id, COUNT(*) AS session_count
+        FROM scrape_sessions s
+        WHERE s.project_id = ANY(p_project_ids)
+        GROUP BY s.project_id
+    ) counts;
+$$ LANGUAGE sql STABLE;
@@ -5,9 +5,27 @@ import os
 import sys
 import uvicorn
 
-# Add the backend directory to the path
-sys.path.append(os.path.abspath("backend"))
+# Add the backend directory to the path once. The reloader's spawned worker
+# re-executes this module, so guard against stacking duplicate entries; resolve
+# relative to this file so the script works from any working directory.
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "backend")
+if BACKEND_DIR not in sys.path:
+    sys.path.append(BACKEND_DIR)
 
 if __name__ == "__main__":
-    print("Starting backend server...")
-    uvicorn.run("app.main:app", host="0.0.0.0", port=8000, reload=True)
+    if os.getenv("ENV") == "production":
+        # A single worker: WebSocket progress (utils/websocket_manager) and the
+        # rotating app.log handler are per-process, so extra workers would miss
+        # each other's progress updates and rotate the same log file concurrently.
+        # "auto" picks uvloop/httptools when installed (uvloop is skipped on Windows).
+        print("Starting backend server...")
+        uvicorn.run(
+            "app.main:app",
+            host="0.0.0.0",
+            port=8000,
+            loop="auto",
+            http="auto"
+        )
+    else:
+        print("Starting backend server...")
+        uvicorn.run("app.main:app", host="0.0.0.0", port=8000, reload=True)